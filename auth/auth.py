@@ -1,11 +1,13 @@
 from fastapi_users.authentication import AuthenticationBackend, JWTStrategy
 
+from auth.strategy import CachedJWTStrategy, StatelessJWTStrategy
 from settings import get_settings, bearer_transport
 
 
 def get_jwt_strategy() -> JWTStrategy:
     settings = get_settings()
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+    strategy_class = StatelessJWTStrategy if settings.jwt_stateless else CachedJWTStrategy
+    return strategy_class(secret=settings.secret, lifetime_seconds=settings.jwt_lifetime_seconds)
 
 
 auth_backend = AuthenticationBackend(
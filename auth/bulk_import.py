@@ -0,0 +1,313 @@
+"""
+Массовый импорт пользователей (онбординг партнёрских сообществ) в обход /auth/register.
+
+Читает CSV (с заголовком) или JSONL потоково, пачками по --chunk-size строк:
+проверяет обязательные поля и длины, уникальность email/username/phone_number
+внутри файла и одним SELECT на пачку против БД, хэширует пароли в пуле процессов
+(или берёт готовый hashed_password) и загружает пачку через COPY (Postgres)
+либо батчевым INSERT ... ON CONFLICT DO NOTHING. Отклонённые строки пишутся в --rejects.
+
+    python -m auth.bulk_import partner_users.csv --rejects rejects.csv --workers 8
+    python -m auth.bulk_import partner_users.jsonl --chunk-size 5000 --dry-run
+
+Поля: email, username, phone_number, first_name, last_name,
+password или hashed_password (argon2/bcrypt), необязательные bio и date_of_birth (YYYY-MM-DD).
+"""
+import argparse
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import Engine, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from auth.models import User
+from settings import get_sync_engine
+
+REQUIRED_FIELDS = ("email", "username", "phone_number", "first_name", "last_name")
+OPTIONAL_FIELDS = ("bio",)
+UNIQUE_FIELDS = ("email", "username", "phone_number")
+
+# Колонки, которые пишет импорт: COPY не применяет Python-дефолты моделей, поэтому задаём все явно
+COPY_COLUMNS = (
+    "email", "username", "phone_number", "first_name", "last_name", "bio", "date_of_birth",
+    "hashed_password", "registered_at", "is_active", "is_superuser", "is_verified",
+    "token_version", "followers_count", "following_count"
+)
+
+_password_helper: Optional[PasswordHelper] = None
+
+
+def hash_password(password: str) -> str:
+    """Выполняется в процессах пула: helper создаётся один раз на процесс."""
+    global _password_helper
+    if _password_helper is None:
+        _password_helper = PasswordHelper()
+    return _password_helper.hash(password)
+
+
+def unique_value(field: str, value: str) -> str:
+    # fastapi-users ищет email без учёта регистра
+    return value.lower() if field == "email" else value
+
+
+def read_records(path: str, fmt: Optional[str] = None) -> Iterator[tuple[int, Optional[dict]]]:
+    """Потоково отдаёт (номер строки файла, запись); некорректная JSON-строка отдаётся как None."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as file:
+        if fmt == "csv":
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                yield line, {key: value for key, value in row.items() if key and value not in (None, "")}
+            return
+
+        for line, raw in enumerate(file, start=1):
+            if not raw.strip():
+                continue
+            try:
+                yield line, json.loads(raw)
+            except json.JSONDecodeError:
+                yield line, None
+
+
+def validate_record(record: Optional[dict], registered_at: datetime) -> tuple[Optional[dict], Optional[str]]:
+    """Собирает строку для вставки. Возвращает (строка, None) или (None, причина отказа)."""
+    if not isinstance(record, dict):
+        return None, "некорректная строка"
+
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        return None, f"нет обязательных полей: {', '.join(missing)}"
+
+    password, hashed_password = record.get("password"), record.get("hashed_password")
+    if not password and not hashed_password:
+        return None, "нет password или hashed_password"
+    if hashed_password and not str(hashed_password).startswith("$"):
+        return None, "hashed_password не похож на хэш argon2/bcrypt"
+
+    row = {field: str(record[field]).strip() for field in REQUIRED_FIELDS}
+    for field in OPTIONAL_FIELDS:
+        row[field] = str(record[field]).strip() if record.get(field) else None
+
+    for field, value in row.items():
+        length = getattr(User.__table__.c[field].type, "length", None)
+        if value is not None and length and len(value) > length:
+            return None, f"{field} длиннее {length} символов"
+
+    try:
+        row["date_of_birth"] = date.fromisoformat(record["date_of_birth"]) if record.get("date_of_birth") else None
+    except (TypeError, ValueError):
+        return None, "date_of_birth не в формате YYYY-MM-DD"
+
+    row.update(
+        # Пароль в открытом виде живёт в строке только до хэширования
+        hashed_password=hashed_password or None,
+        password=None if hashed_password else str(password),
+        registered_at=registered_at,
+        is_active=True,
+        is_superuser=False,
+        is_verified=False,
+        token_version=0,
+        followers_count=0,
+        following_count=0
+    )
+    return row, None
+
+
+def chunked(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class UserBulkImporter:
+    """
+    Загрузчик пачек пользователей. Каждая пачка — своя транзакция:
+    упавшая пачка не откатывает уже загруженные.
+
+    Уникальность проверяется заранее, но между SELECT и загрузкой пользователь может
+    зарегистрироваться через API. Тогда COPY падает целиком, и пачка повторяется
+    INSERT ... ON CONFLICT DO NOTHING — не вставленные строки уходят в отказы.
+    """
+
+    def __init__(
+            self,
+            engine: Engine,
+            chunk_size: int = 1000,
+            workers: int = 4,
+            dry_run: bool = False,
+            on_reject: Optional[Callable[[int, str, dict], None]] = None
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.on_reject = on_reject
+        # Уникальные значения уже принятых строк файла
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.stats = {"read": 0, "imported": 0, "rejected": 0}
+
+    def reject(self, line: int, reason: str, record: Optional[dict]):
+        self.stats["rejected"] += 1
+        if self.on_reject:
+            self.on_reject(line, reason, record if isinstance(record, dict) else {})
+
+    def run(self, records: Iterable[tuple[int, Optional[dict]]]) -> dict:
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        try:
+            for chunk in chunked(records, self.chunk_size):
+                self.import_chunk(chunk, executor)
+        finally:
+            if executor:
+                executor.shutdown()
+        return self.stats
+
+    def import_chunk(self, chunk: list[tuple[int, Optional[dict]]], executor: Optional[ProcessPoolExecutor]):
+        self.stats["read"] += len(chunk)
+        registered_at = datetime.utcnow()
+
+        candidates = []
+        for line, record in chunk:
+            row, reason = validate_record(record, registered_at)
+            if reason:
+                self.reject(line, reason, record)
+            else:
+                candidates.append((line, row))
+
+        taken = self.fetch_taken(candidates)
+
+        accepted = []
+        for line, row in candidates:
+            reason = None
+            for field in UNIQUE_FIELDS:
+                value = unique_value(field, row[field])
+                if value in taken[field]:
+                    reason = f"{field} уже зарегистрирован"
+                elif value in self.seen[field]:
+                    reason = f"{field} повторяется в файле"
+                if reason:
+                    break
+            if reason:
+                self.reject(line, reason, row)
+                continue
+            for field in UNIQUE_FIELDS:
+                self.seen[field].add(unique_value(field, row[field]))
+            accepted.append((line, row))
+
+        if not accepted or self.dry_run:
+            return
+
+        self.hash_passwords([row for _, row in accepted], executor)
+        rows = [{column: row[column] for column in COPY_COLUMNS} for _, row in accepted]
+
+        if self.engine.dialect.name == "postgresql":
+            try:
+                with self.engine.begin() as connection:
+                    self.copy_rows(connection, rows)
+                self.stats["imported"] += len(rows)
+                return
+            except self.engine.dialect.dbapi.IntegrityError:
+                pass
+
+        with self.engine.begin() as connection:
+            inserted = self.insert_rows(connection, rows)
+        for line, row in accepted:
+            if row["username"] in inserted:
+                self.stats["imported"] += 1
+            else:
+                self.reject(line, "уже зарегистрирован (параллельная регистрация)", row)
+
+    def fetch_taken(self, candidates: list[tuple[int, dict]]) -> dict[str, set]:
+        """Одним SELECT находит email/username/телефоны пачки, уже занятые в БД."""
+        taken = {field: set() for field in UNIQUE_FIELDS}
+        if not candidates:
+            return taken
+
+        values = {field: {unique_value(field, row[field]) for _, row in candidates} for field in UNIQUE_FIELDS}
+        query = select(User.email, User.username, User.phone_number).where(or_(
+            func.lower(User.email).in_(values["email"]),
+            User.username.in_(values["username"]),
+            User.phone_number.in_(values["phone_number"])
+        ))
+        with self.engine.connect() as connection:
+            for user in connection.execute(query):
+                for field in UNIQUE_FIELDS:
+                    taken[field].add(unique_value(field, getattr(user, field)))
+        return taken
+
+    @staticmethod
+    def hash_passwords(rows: list[dict], executor: Optional[ProcessPoolExecutor]):
+        pending = [row for row in rows if row["hashed_password"] is None]
+        passwords = [row.pop("password") for row in pending]
+        hashes = executor.map(hash_password, passwords, chunksize=32) if executor else map(hash_password, passwords)
+        for row, hashed_password in zip(pending, hashes):
+            row["hashed_password"] = hashed_password
+
+    @staticmethod
+    def copy_rows(connection, rows: list[dict]):
+        """COPY ... FROM STDIN в формате CSV через psycopg2 (пустое значение без кавычек — NULL)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row[column] is None else row[column] for column in COPY_COLUMNS])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY "user" ({", ".join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def insert_rows(connection, rows: list[dict]) -> set[str]:
+        """Батчевый INSERT ... ON CONFLICT DO NOTHING. Возвращает username вставленных строк."""
+        insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+        result = connection.execute(insert(User).on_conflict_do_nothing().returning(User.username), rows)
+        return set(result.scalars())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV с заголовком или JSONL")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="по умолчанию — по расширению файла")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="строк в пачке (одна транзакция)")
+    parser.add_argument("--workers", type=int, default=4, help="процессов для хэширования (0 — в текущем)")
+    parser.add_argument("--rejects", help="CSV для отклонённых строк (line, reason, email, username)")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить, ничего не записывать")
+    args = parser.parse_args()
+
+    rejects_file = open(args.rejects, "w", newline="", encoding="utf-8") if args.rejects else None
+    rejects_writer = csv.writer(rejects_file) if rejects_file else None
+    if rejects_writer:
+        rejects_writer.writerow(["line", "reason", "email", "username"])
+
+    def on_reject(line: int, reason: str, record: dict):
+        if rejects_writer:
+            rejects_writer.writerow([line, reason, record.get("email", ""), record.get("username", "")])
+
+    importer = UserBulkImporter(
+        get_sync_engine(),
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        dry_run=args.dry_run,
+        on_reject=on_reject
+    )
+    try:
+        stats = importer.run(read_records(args.path, args.format))
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import logging
+import uuid
+from typing import Literal, Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from auth.models import User, user_subscriptions
+from cache import redis_circuit
+from settings import get_async_redis, get_settings
+
+logger = logging.getLogger("app_logger")
+
+Direction = Literal["following", "followers"]
+
+# Пустое множество Redis удаляет, поэтому в каждом зеркале есть служебный элемент
+SENTINEL = "0"
+WARM_CHUNK = 10_000
+
+# Меняет множество, только если зеркало уже прогрето: частичное множество хуже отсутствующего.
+# Пока зеркало прогревается (есть ключ <key>:journaling), операция ещё и пишется в журнал —
+# прогрев применит её поверх снимка из БД, иначе тоггл между снимком и RENAME потерялся бы
+UPDATE_IF_EXISTS_LUA = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call(ARGV[1], key, ARGV[i + 1])
+    end
+    if redis.call('EXISTS', key .. ':journaling') == 1 then
+        redis.call('RPUSH', key .. ':journal', ARGV[1] .. ' ' .. ARGV[i + 1])
+        redis.call('EXPIRE', key .. ':journal', ARGV[#KEYS + 2])
+    end
+end
+return 1
+"""
+
+# Завершает прогрев: снимок становится зеркалом, журнал тогглов за время прогрева применяется поверх.
+# Если зеркало успел прогреть параллельный запрос, снимок выбрасывается
+FINISH_WARM_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+for _, op in ipairs(redis.call('LRANGE', KEYS[4], 0, -1)) do
+    local command, member = string.match(op, '^(%S+) (%S+)$')
+    redis.call(command, KEYS[2], member)
+end
+redis.call('DEL', KEYS[3], KEYS[4])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Сколько секунд живут флаг и журнал прогрева, если прогрев упал, не дойдя до конца
+WARM_JOURNAL_TTL = 60
+
+# (колонка-фильтр, колонка-значение) в user_subscriptions для каждого направления
+COLUMNS = {
+    "following": (user_subscriptions.c.follower_id, user_subscriptions.c.following_id),
+    "followers": (user_subscriptions.c.following_id, user_subscriptions.c.follower_id)
+}
+COUNTERS = {"following": User.following_count, "followers": User.followers_count}
+
+
+def follow_set_key(user_id: int, direction: Direction) -> str:
+    return f"follow:{user_id}:{direction}"
+
+
+class FollowSetCache:
+    """
+    Зеркала подписок в Redis-множествах: follow:{id}:following и follow:{id}:followers.
+
+    Прогреваются при первом обращении (если множество не больше max_warm элементов),
+    живут ttl секунд и обновляются тогглом подписки только если уже существуют.
+    Пересечение считает SINTER — стоимость ограничена меньшим множеством.
+    Когда зеркало холодное, слишком большое или Redis недоступен,
+    пересечение считается в SQL соединением по индексам user_subscriptions.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.ttl = settings.follow_set_ttl
+        self.max_warm = settings.follow_set_max_warm
+        self._script = None
+        self._finish_warm_script = None
+
+    async def _update_if_exists(self, command: str, follower_id: int, following_id: int):
+        try:
+            if self._script is None:
+                self._script = get_async_redis().register_script(UPDATE_IF_EXISTS_LUA)
+            await self._script(
+                keys=[follow_set_key(follower_id, "following"), follow_set_key(following_id, "followers")],
+                args=[command, following_id, follower_id, WARM_JOURNAL_TTL]
+            )
+        except RedisError as e:
+            # Устаревшее зеркало хуже холодного — пробуем удалить оба ключа
+            logger.error(f"Can't update follow sets {follower_id} -> {following_id}: {e}")
+            try:
+                await get_async_redis().delete(
+                    follow_set_key(follower_id, "following"), follow_set_key(following_id, "followers")
+                )
+            except RedisError:
+                pass
+
+    async def on_follow(self, follower_id: int, following_id: int):
+        await self._update_if_exists("SADD", follower_id, following_id)
+
+    async def on_unfollow(self, follower_id: int, following_id: int):
+        await self._update_if_exists("SREM", follower_id, following_id)
+
+    async def _warm(self, session: AsyncSession, user_id: int, direction: Direction) -> bool:
+        """Заполняет зеркало из БД. False — множество слишком большое или Redis недоступен."""
+        size = await session.scalar(select(COUNTERS[direction]).where(User.id == user_id))
+        if size is None or size > self.max_warm:
+            return False
+
+        key = follow_set_key(user_id, direction)
+        tmp_key = f"{key}:warming:{uuid.uuid4().hex}"
+        try:
+            # Флаг ставится до чтения снимка: тогглы, не попавшие в снимок, окажутся в журнале
+            await get_async_redis().set(f"{key}:journaling", 1, ex=WARM_JOURNAL_TTL)
+
+            filter_column, value_column = COLUMNS[direction]
+            ids = (await session.execute(select(value_column).where(filter_column == user_id))).scalars().all()
+
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                pipe.sadd(tmp_key, SENTINEL)
+                for start in range(0, len(ids), WARM_CHUNK):
+                    pipe.sadd(tmp_key, *ids[start:start + WARM_CHUNK])
+                pipe.expire(tmp_key, WARM_JOURNAL_TTL)
+                await pipe.execute()
+
+            if self._finish_warm_script is None:
+                self._finish_warm_script = get_async_redis().register_script(FINISH_WARM_LUA)
+            await self._finish_warm_script(
+                keys=[tmp_key, key, f"{key}:journaling", f"{key}:journal"],
+                args=[self.ttl]
+            )
+        except RedisError as e:
+            redis_circuit.failed(e)
+            return False
+        return True
+
+    async def _ensure(self, session: AsyncSession, user_id: int, direction: Direction) -> bool:
+        if await get_async_redis().exists(follow_set_key(user_id, direction)):
+            return True
+        return await self._warm(session, user_id, direction)
+
+    async def intersect(
+            self,
+            session: AsyncSession,
+            user_id: int,
+            direction: Direction,
+            target_id: int
+    ) -> Optional[list[int]]:
+        """
+        Пересечение подписок/подписчиков user_id с подписчиками target_id из Redis.
+        None — зеркала недоступны, нужен SQL.
+        """
+        if not redis_circuit.available:
+            return None
+        try:
+            if not (await self._ensure(session, user_id, direction)
+                    and await self._ensure(session, target_id, "followers")):
+                return None
+            members = await get_async_redis().sinter(
+                follow_set_key(user_id, direction), follow_set_key(target_id, "followers")
+            )
+        except RedisError as e:
+            redis_circuit.failed(e)
+            return None
+        return sorted(int(member) for member in members if member != SENTINEL)
+
+    @staticmethod
+    async def intersect_sql(
+            session: AsyncSession,
+            user_id: int,
+            direction: Direction,
+            target_id: int,
+            limit: int
+    ) -> tuple[int, list[int]]:
+        """
+        То же соединением: связи user_id по индексу направления,
+        для каждой — точечная проверка по PK (follower_id, following_id) подписки на target_id.
+        """
+        filter_column, value_column = COLUMNS[direction]
+        target = aliased(user_subscriptions)
+        query = (
+            select(value_column)
+            .join(target, target.c.follower_id == value_column)
+            .where(filter_column == user_id, target.c.following_id == target_id)
+        )
+        count = await session.scalar(select(func.count()).select_from(query.subquery()))
+        sample = (await session.execute(query.order_by(value_column).limit(limit))).scalars().all()
+        return count, list(sample)
+
+
+follow_set_cache = FollowSetCache()
@@ -1,24 +1,41 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi_users import BaseUserManager, IntegerIDMixin
-from fastapi_users.password import PasswordHelper
+from fastapi_users import BaseUserManager, IntegerIDMixin, exceptions, schemas
 
 from auth.models import User
+from auth.password import password_hashing_pool
+from auth.principal_cache import principal_cache
+from auth.profile_cache import profile_cache
+from auth.revocation import revocation_filter
+from auth.user_db_interface import UserDBInterface
 from auth.utils import get_user_db
+from celery_main import celery_app
 from settings import get_settings
 
 
 settings = get_settings()
 
+user_db_interface = UserDBInterface()
+
+# Задачи, отпускающие ссылку на media_blob, по виду изображения
+RELEASE_BLOB_TASKS = {
+    "gallery": "celery_tasks.delete_media",
+    "post": "celery_tasks.delete_post_image",
+    "comment": "celery_tasks.delete_comment_image"
+}
+
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     reset_password_token_secret = settings.secret
     verification_token_secret = settings.secret
 
     def __init__(self, user_db):
         super().__init__(user_db)
-        self.password_helper = PasswordHelper()  # Создаем экземпляр PasswordHelper
+        # Синхронный helper остаётся для кода fastapi-users; сами хэши считаются в пуле потоков
+        self.password_helper = password_hashing_pool.helper
+        # user_id -> изображения, удаляемые каскадом вместе с пользователем (между before/after delete)
+        self._deleted_blobs = {}
 
     # Переопределяем authenticate, чтобы логиниться по username
     async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
@@ -26,8 +43,8 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
         if user is None:
             return None
 
-        # Проверяем пароль через метод verify_and_update
-        is_valid_password, _ = self.password_helper.verify_and_update(
+        # Проверяем пароль вне event loop
+        is_valid_password, _ = await password_hashing_pool.verify_and_update(
             credentials.password, user.hashed_password
         )
         if not is_valid_password:
@@ -38,9 +55,65 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
         return user
 
+    # То же, что BaseUserManager.create, но хэш пароля считается в пуле потоков
+    async def create(
+            self,
+            user_create: schemas.UC,
+            safe: bool = False,
+            request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await password_hashing_pool.hash(password)
+
+        created_user = await self.user_db.create(user_dict)
+
+        await self.on_after_register(created_user, request)
+
+        return created_user
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
 
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        update_dict = dict(update_dict)
+        password = update_dict.pop("password", None)
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict["hashed_password"] = await password_hashing_pool.hash(password)
+
+        # Смена пароля и деактивация отзывают ранее выданные токены
+        revoked_version = None
+        if password is not None or update_dict.get("is_active") is False:
+            revoked_version = user.token_version
+            update_dict["token_version"] = user.token_version + 1
+
+        # _update вызывают и update, и reset_password, и verify — сбрасываем кэш здесь
+        updated_user = await super()._update(user, update_dict)
+        await principal_cache.invalidate(updated_user.id)
+        await profile_cache.invalidate(updated_user.id)
+        if revoked_version is not None:
+            await revocation_filter.add(updated_user.id, revoked_version)
+        return updated_user
+
+    async def on_before_delete(self, user: User, request: Optional[Request] = None):
+        # Каскад удалит строки изображений, но не уменьшит ref_count их media_blob
+        self._deleted_blobs[user.id] = await user_db_interface.fetch_blobs(self.user_db.session, user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        for kind, url, sha256 in self._deleted_blobs.pop(user.id, []):
+            celery_app.send_task(RELEASE_BLOB_TASKS[kind], args=[url, sha256])
+
+        await principal_cache.invalidate(user.id)
+        await profile_cache.invalidate(user.id)
+        await revocation_filter.add(user.id, user.token_version)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
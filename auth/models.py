@@ -10,7 +10,8 @@ from sqlalchemy import (
     Date,
     Table,
     ForeignKey,
-    Computed
+    Computed,
+    Index
 )
 from sqlalchemy.orm import relationship
 
@@ -20,7 +21,9 @@ user_subscriptions = Table(
     'user_subscriptions',
     Base.metadata,
     Column('follower_id', Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
-    Column('following_id', Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    Column('following_id', Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
+    # PK обслуживает выборки "на кого подписан", этот индекс — "кто подписан"
+    Index('ix_user_subscriptions_following_id_follower_id', 'following_id', 'follower_id')
 )
 
 
@@ -30,6 +33,8 @@ class UserGallery(Base):
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=True)
+    # SHA-256 общего файла в media_blob (NULL у загрузок до content-addressed хранилища)
+    blob_sha256 = Column(String(64), nullable=True)
     uploaded_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False, index=True)
@@ -41,8 +46,27 @@ class UserGallery(Base):
 
 
 
+class UserFollowSuggestion(Base):
+    """Предрассчитанные подсказки "возможно, вы знакомы" (celery_tasks.build_follow_suggestions)."""
+    __tablename__ = 'user_follow_suggestion'
+
+    user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    suggested_user_id = Column(Integer, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    # Число общих связей: сколько подписок пользователя подписаны на кандидата
+    score = Column(Integer, nullable=False)
+    computed_at = Column(TIMESTAMP, default=datetime.utcnow, nullable=False)
+
+
 class User(SQLAlchemyBaseUserTable[int], Base):
     __tablename__ = 'user'
+    __table_args__ = (
+        Index(
+            "ix_user_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"}
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, nullable=False, unique=True, index=True)
@@ -58,11 +82,17 @@ class User(SQLAlchemyBaseUserTable[int], Base):
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
+    # Версия токенов: увеличение отзывает все выданные JWT (claim "ver")
+    token_version = Column(Integer, default=0, nullable=False)
+    # Денормализованные счётчики подписок, обновляются вместе с user_subscriptions
+    followers_count = Column(Integer, default=0, nullable=False)
+    following_count = Column(Integer, default=0, nullable=False)
 
     posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
     likes = relationship("Like", back_populates="user", cascade="all, delete-orphan")
     dislikes = relationship("Dislike", back_populates="user", cascade="all, delete-orphan")
+    reactions = relationship("Reaction", back_populates="user", cascade="all, delete-orphan")
     community_memberships = relationship(
         "CommunityMembership",
         back_populates="user",
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+from fastapi_users.password import PasswordHelper
+
+from settings import get_settings
+
+T = TypeVar("T")
+
+
+class PasswordHashingPool:
+    """
+    Хэширование и проверка паролей (Argon2/bcrypt) в ограниченном пуле потоков,
+    чтобы CPU-работа не блокировала event loop. Обе библиотеки отпускают GIL.
+
+    Одновременно работают не больше workers задач, остальные ждут в очереди.
+    Если в очереди уже max_queue задач, новая сразу отклоняется с 503 —
+    шторм логинов не копит бесконечную очередь и не растит латентность остальных.
+    """
+
+    def __init__(self, workers: int, max_queue: int, helper: Optional[PasswordHelper] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.helper = helper or PasswordHelper()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+        # Время ожидания пишут потоки пула, остальные счётчики — event loop; stats() читает всё под замком
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.workers, 0)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self.max_queue and self.queued >= self.max_queue:
+            with self.lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Сервис перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"}
+            )
+
+        submitted_at = time.perf_counter()
+
+        def timed():
+            wait = time.perf_counter() - submitted_at
+            with self.lock:
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            return func(*args)
+
+        with self.lock:
+            self.in_flight += 1
+            self.submitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.helper.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(self.helper.verify_and_update, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": self.total_wait_seconds / self.completed * 1000 if self.completed else 0.0,
+                "max_wait_ms": self.max_wait_seconds * 1000
+            }
+
+
+settings = get_settings()
+
+password_hashing_pool = PasswordHashingPool(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue
+)
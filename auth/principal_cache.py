@@ -0,0 +1,119 @@
+import datetime
+import json
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from auth.models import User
+from cache import LocalTTLCache, MISSING, redis_circuit
+from settings import get_async_redis, get_redis, get_settings
+
+# Хэш пароля в кэш не попадает; часто меняющиеся счётчики остаются незагруженными
+# и читаются из БД явным session.refresh (см. PrincipalCache.attach)
+EXCLUDED_COLUMNS = {"hashed_password", "followers_count", "following_count"}
+
+
+def principal_key(user_id: int) -> str:
+    return f"principal:{user_id}"
+
+
+def user_snapshot(user: User) -> dict:
+    return {
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+        if column.key not in EXCLUDED_COLUMNS
+    }
+
+
+def dump_snapshot(snapshot: dict) -> str:
+    return json.dumps(
+        snapshot,
+        default=lambda value: value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+    )
+
+
+def load_snapshot(raw: str) -> dict:
+    snapshot = json.loads(raw)
+    for column in User.__table__.columns:
+        value = snapshot.get(column.key)
+        if isinstance(value, str) and column.type.python_type in (datetime.date, datetime.datetime):
+            snapshot[column.key] = column.type.python_type.fromisoformat(value)
+    return snapshot
+
+
+class PrincipalCache:
+    """
+    Кэш аутентифицированного пользователя для JWT-запросов: user_id -> снимок колонок User.
+
+    Уровни: LRU в памяти процесса (короткий TTL) -> Redis (principal:{id}) -> БД.
+    Снимок хранит token_version: токен с другой версией отклоняется стратегией.
+    Сбрасывается хуками UserManager при обновлении, деактивации и удалении пользователя.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.ttl = settings.principal_cache_ttl
+        self.local = LocalTTLCache(maxsize=50_000, ttl=settings.principal_cache_local_ttl)
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        snapshot = self.local.get(user_id)
+        if snapshot is not MISSING:
+            return snapshot
+
+        if not redis_circuit.available:
+            return None
+        try:
+            raw = await get_async_redis().get(principal_key(user_id))
+        except RedisError as e:
+            redis_circuit.failed(e)
+            return None
+        if raw is None:
+            return None
+
+        snapshot = load_snapshot(raw)
+        self.local.set(user_id, snapshot)
+        return snapshot
+
+    async def set(self, user: User):
+        snapshot = user_snapshot(user)
+        self.local.set(user.id, snapshot)
+        if not redis_circuit.available:
+            return
+        try:
+            await get_async_redis().set(principal_key(user.id), dump_snapshot(snapshot), ex=self.ttl)
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+    async def invalidate(self, user_id: int):
+        self.local.delete(user_id)
+        try:
+            await get_async_redis().delete(principal_key(user_id))
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+    @staticmethod
+    async def attach(session: AsyncSession, snapshot: dict) -> User:
+        """
+        Собирает User из снимка и привязывает к сессии запроса без SELECT.
+
+        Колонки, которых нет в снимке (EXCLUDED_COLUMNS, а в stateless-режиме всё, кроме claims токена),
+        остаются незагруженными: обычное чтение current_user.followers_count в async-обработчике
+        падает с MissingGreenlet. Такие колонки загружаются явно:
+        await session.refresh(current_user, ["followers_count"]).
+        """
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+
+def invalidate_principal_sync(user_id: int):
+    """Для Celery-задач, меняющих пользователя: локальные кэши веб-процессов доживут свой короткий TTL."""
+    try:
+        get_redis().delete(principal_key(user_id))
+    except RedisError:
+        pass
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,75 @@
+import json
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from cache import LocalTTLCache, MISSING, redis_circuit
+from settings import get_async_redis, get_redis, get_settings
+
+
+def profile_key(user_id: int) -> str:
+    return f"profile:{user_id}"
+
+
+class ProfileCache:
+    """
+    Кэш агрегированного профиля пользователя: user_id -> JSON-готовый словарь UserProfile.
+
+    Уровни: LRU в памяти процесса -> Redis (profile:{id}) -> один SELECT в БД.
+    Сбрасывается после commit при подписке/отписке (оба пользователя), создании/удалении поста,
+    вступлении/выходе из сообщества, изменении галереи и аватара.
+    Массовые изменения (импорт участников, удаление сообщества) не сбрасывают кэш —
+    счётчик сообществ догоняет БД за короткий TTL.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.ttl = settings.profile_cache_ttl
+        self.local = LocalTTLCache(maxsize=10_000, ttl=settings.profile_cache_local_ttl)
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        profile = self.local.get(user_id)
+        if profile is not MISSING:
+            return profile
+
+        if not redis_circuit.available:
+            return None
+        try:
+            raw = await get_async_redis().get(profile_key(user_id))
+        except RedisError as e:
+            redis_circuit.failed(e)
+            return None
+        if raw is None:
+            return None
+
+        profile = json.loads(raw)
+        self.local.set(user_id, profile)
+        return profile
+
+    async def set(self, user_id: int, profile: dict):
+        self.local.set(user_id, profile)
+        if not redis_circuit.available:
+            return
+        try:
+            await get_async_redis().set(profile_key(user_id), json.dumps(profile), ex=self.ttl)
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+    async def invalidate(self, *user_ids: int):
+        for user_id in user_ids:
+            self.local.delete(user_id)
+        try:
+            await get_async_redis().delete(*map(profile_key, user_ids))
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+
+def invalidate_profile_sync(user_id: int):
+    """Для Celery-задач (аватар, галерея): локальные кэши веб-процессов доживут свой короткий TTL."""
+    try:
+        get_redis().delete(profile_key(user_id))
+    except RedisError:
+        pass
+
+
+profile_cache = ProfileCache()
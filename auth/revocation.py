@@ -0,0 +1,128 @@
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from settings import get_async_redis_binary, get_settings
+
+logger = logging.getLogger("app_logger")
+
+BLOOM_KEY = "jwt_revocations:bloom:{generation}"
+VERSION_KEY = "jwt_revocations:version"
+HASHES = 7
+
+
+class RevocationFilter:
+    """
+    Компактное множество отозванных пар (user_id, token_version) для stateless JWT:
+    Bloom-фильтр — битовая строка в Redis (SETBIT) плюс локальная копия в процессе.
+
+    Ложноположительный ответ не отклоняет токен, а только отправляет его на обычную
+    проверку через кэш/БД, поэтому точность влияет лишь на долю медленных запросов.
+
+    Фильтры разбиты на поколения длиной в срок жизни токена: проверяются текущее
+    и предыдущее, более старые истекают сами — отозванные в них токены уже просрочены.
+    Локальная копия перечитывается, когда меняется счётчик версий в Redis,
+    но не чаще раза в refresh_seconds.
+    """
+
+    def __init__(self, bits: int, lifetime_seconds: int, refresh_seconds: float):
+        self.bits = bits
+        self.lifetime_seconds = lifetime_seconds
+        self.refresh_seconds = refresh_seconds
+
+        self._bitmaps: dict[int, bytearray] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def _generation(self) -> int:
+        return int(time.time() // self.lifetime_seconds)
+
+    def _positions(self, user_id: int, version: int) -> list[int]:
+        digest = hashlib.blake2b(f"{user_id}:{version}".encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.bits for i in range(HASHES)]
+
+    def _set_local(self, generation: int, positions: list[int]):
+        bitmap = self._bitmaps.setdefault(generation, bytearray())
+        for position in positions:
+            byte = position >> 3
+            if len(bitmap) <= byte:
+                bitmap.extend(bytes(byte + 1 - len(bitmap)))
+            # Порядок бит как у Redis SETBIT: 0-й бит — старший бит первого байта
+            bitmap[byte] |= 0x80 >> (position & 7)
+
+    def _contains_local(self, generation: int, positions: list[int]) -> bool:
+        bitmap = self._bitmaps.get(generation)
+        if not bitmap:
+            return False
+        for position in positions:
+            byte = position >> 3
+            if byte >= len(bitmap) or not bitmap[byte] & (0x80 >> (position & 7)):
+                return False
+        return True
+
+    async def _refresh(self):
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        self._checked_at = time.monotonic()
+
+        redis = get_async_redis_binary()
+        version = int(await redis.get(VERSION_KEY) or 0)
+        if version == self._version:
+            return
+
+        generation = self._generation()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(BLOOM_KEY.format(generation=generation))
+            pipe.get(BLOOM_KEY.format(generation=generation - 1))
+            current, previous = await pipe.execute()
+        self._bitmaps = {
+            generation: bytearray(current or b""),
+            generation - 1: bytearray(previous or b"")
+        }
+        self._version = version
+
+    async def add(self, user_id: int, version: int):
+        """Отзывает все токены пользователя с данной версией."""
+        generation = self._generation()
+        positions = self._positions(user_id, version)
+        self._set_local(generation, positions)
+
+        key = BLOOM_KEY.format(generation=generation)
+        try:
+            async with get_async_redis_binary().pipeline(transaction=True) as pipe:
+                for position in positions:
+                    pipe.setbit(key, position, 1)
+                pipe.expire(key, self.lifetime_seconds * 2)
+                pipe.incr(VERSION_KEY)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Can't publish JWT revocation of user {user_id} v{version}: {e}")
+
+    async def might_be_revoked(self, user_id: int, version: int) -> bool:
+        """
+        False — токен точно не отозван. True — возможно отозван,
+        либо состояние фильтра неизвестно (Redis недоступен и копии ещё нет).
+        """
+        try:
+            await self._refresh()
+        except RedisError as e:
+            logger.error(f"Can't refresh JWT revocation filter: {e}")
+        if self._version is None:
+            return True
+
+        positions = self._positions(user_id, version)
+        generation = self._generation()
+        return self._contains_local(generation, positions) or self._contains_local(generation - 1, positions)
+
+
+settings = get_settings()
+
+revocation_filter = RevocationFilter(
+    bits=settings.jwt_revocation_bloom_bits,
+    lifetime_seconds=settings.jwt_lifetime_seconds,
+    refresh_seconds=settings.jwt_revocation_refresh_seconds
+)
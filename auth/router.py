@@ -1,6 +1,5 @@
 import os
-import shutil
-import uuid
+from typing import Optional
 
 from fastapi import (
     APIRouter,
@@ -8,25 +7,36 @@ from fastapi import (
     HTTPException,
     UploadFile,
     File,
+    Query,
     status
 )
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.user_db_interface import UserDBInterface, UserInterface
+from auth.user_db_interface import SubscriptionDBInterface, UserDBInterface, UserInterface
 from celery_main import celery_app
 from dependencies import current_user
 from auth.models import User
+from auth.follow_sets import Direction, follow_set_cache
+from auth.profile_cache import profile_cache
+from auth.schemas import FollowIntersection, FollowSuggestion, UserProfile, UserSummary, UsersPage
 from settings import (
     get_async_session,
     get_settings
 )
+from uploads import save_upload, save_uploads
 
 router = APIRouter(
     prefix="/subscriptions",
     tags=["Subscriptions 🔔"]
 )
 
+router_users = APIRouter(
+    prefix="/users",
+    tags=["Users 👤"]
+)
+
 router_user_images = APIRouter(
     prefix="/media",
     tags=["User media 🖼️"]
@@ -34,6 +44,7 @@ router_user_images = APIRouter(
 
 user_db_interface = UserDBInterface()
 user_interface = UserInterface()
+subscription_db_interface = SubscriptionDBInterface()
 settings = get_settings()
 
 @router.post("/follow/{user_id}", summary="Подписаться/Отписаться от пользователя")
@@ -42,50 +53,153 @@ async def toggle_follow_user(
         session: AsyncSession = Depends(get_async_session),
         current_user: User = Depends(current_user)
 ):
-    await session.refresh(current_user, attribute_names=["following"])
+    username = await session.scalar(select(User.username).where(User.id == user_id))
 
-    user_to_follow = await user_interface.fetch_one(session, user_id)
-
-    if not user_to_follow:
+    if username is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    if user_to_follow in current_user.following:
-        current_user.following.remove(user_to_follow)
+    # DELETE по первичному ключу: строка была — это отписка, иначе подписка
+    if await subscription_db_interface.unfollow(session, current_user.id, user_id):
         await session.commit()
-        return {"message": f"Вы успешно отписались от {user_to_follow.username}"}
-    current_user.following.append(user_to_follow)
-    await session.commit()
-    return {"message": f"Вы успешно подписались на {user_to_follow.username}"}
+        await follow_set_cache.on_unfollow(current_user.id, user_id)
+        await profile_cache.invalidate(current_user.id, user_id)
+        return {"message": f"Вы успешно отписались от {username}"}
+
+    try:
+        await subscription_db_interface.follow(session, current_user.id, user_id)
+        await session.commit()
+    except IntegrityError:
+        # Параллельный запрос уже создал подписку
+        await session.rollback()
+    await follow_set_cache.on_follow(current_user.id, user_id)
+    await profile_cache.invalidate(current_user.id, user_id)
+    return {"message": f"Вы успешно подписались на {username}"}
+
+
+@router_users.get("/search/", response_model=list[UserSummary], summary="Поиск пользователей")
+async def search_users(
+        q: str = Query(..., min_length=2, max_length=100),
+        limit: int = Query(default=10, ge=1, le=50),
+        session: AsyncSession = Depends(get_async_session)
+):
+    return await user_interface.search(session, q, limit)
+
+
+@router_users.get("/me/suggestions/", response_model=list[FollowSuggestion], summary="Возможно, вы знакомы")
+async def get_follow_suggestions(
+        limit: int = Query(default=20, ge=1, le=50),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    rows = await subscription_db_interface.fetch_suggestions(session, current_user.id, limit)
+
+    return [{"user": user, "score": score} for user, score in rows]
+
+
+@router_users.get("/{user_id}/profile/", response_model=UserProfile, summary="Профиль пользователя")
+async def get_user_profile(user_id: int, session: AsyncSession = Depends(get_async_session)):
+    profile = await profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    profile = await user_interface.fetch_profile(session, user_id, settings.profile_gallery_limit)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+    profile = UserProfile.model_validate(profile).model_dump(mode="json")
+    await profile_cache.set(user_id, profile)
+    return profile
+
+
+@router_users.get("/{user_id}/followers/", response_model=UsersPage, summary="Подписчики пользователя")
+async def get_followers(
+        user_id: int,
+        after: Optional[int] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        session: AsyncSession = Depends(get_async_session)
+):
+    users = await subscription_db_interface.fetch_followers(session, user_id, after, limit)
+
+    return {"items": users[:limit], "next_cursor": users[limit - 1].id if len(users) > limit else None}
+
+
+@router_users.get("/{user_id}/following/", response_model=UsersPage, summary="Подписки пользователя")
+async def get_following(
+        user_id: int,
+        after: Optional[int] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        session: AsyncSession = Depends(get_async_session)
+):
+    users = await subscription_db_interface.fetch_following(session, user_id, after, limit)
+
+    return {"items": users[:limit], "next_cursor": users[limit - 1].id if len(users) > limit else None}
+
+
+async def follow_intersection(
+        session: AsyncSession,
+        user_id: int,
+        direction: Direction,
+        target_id: int,
+        limit: int
+):
+    ids = await follow_set_cache.intersect(session, user_id, direction, target_id)
+    if ids is None:
+        count, ids = await follow_set_cache.intersect_sql(session, user_id, direction, target_id, limit)
+    else:
+        count = len(ids)
+
+    result = await session.execute(select(User).where(User.id.in_(ids[:limit])).order_by(User.id))
+    return {"count": count, "users": result.scalars().all()}
+
+
+@router_users.get(
+    "/{user_id}/followed-by/",
+    response_model=FollowIntersection,
+    summary="Кто из моих подписок подписан на пользователя"
+)
+async def get_followed_by_my_following(
+        user_id: int,
+        limit: int = Query(default=3, ge=0, le=50),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    return await follow_intersection(session, current_user.id, "following", user_id, limit)
+
+
+@router_users.get(
+    "/{user_id}/mutual-followers/",
+    response_model=FollowIntersection,
+    summary="Общие подписчики со мной"
+)
+async def get_mutual_followers(
+        user_id: int,
+        limit: int = Query(default=3, ge=0, le=50),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    return await follow_intersection(session, current_user.id, "followers", user_id, limit)
 
 
 @router_user_images.post("/user/{user_id}/avatar/", summary="Установить пользователю аватар")
 async def upload_avatar(user_id: int, file: UploadFile = File(...)):
-    temp_path = f"{settings.media_temp_avatar_dir}/{uuid.uuid4()}_{file.filename}"
-    with open(temp_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    upload = await save_upload(file, settings.media_temp_avatar_dir)
 
     celery_app.send_task(
         "celery_tasks.process_avatar.process_avatar",
-        args=[user_id, temp_path, settings.media_avatar_dir]
+        args=[user_id, upload.path, settings.media_avatar_dir]
     )
     return {"status": "processing"}
 
 
 @router_user_images.post("/users/{user_id}/photos/", summary="Добавить фотаграфии", status_code=status.HTTP_201_CREATED)
 async def upload_photos(user_id: int, files: list[UploadFile] = File(...)):
-    os.makedirs(settings.media_temp_user_photos_dir, exist_ok=True)
-
-    for file in files:
-        tmp_name = f"{uuid.uuid4()}_{file.filename}"
-        tmp_path = os.path.join(settings.media_temp_user_photos_dir, tmp_name)
-
-        # Сохраняем во временное хранилище
-        with open(tmp_path, "wb") as buf:
-            buf.write(await file.read())
+    # Сохраняем во временное хранилище
+    uploads = await save_uploads(files, settings.media_temp_user_photos_dir)
 
+    for upload in uploads:
         celery_app.send_task(
             "celery_tasks.process_gallery.process_gallery",
-            args=[user_id, tmp_path]
+            args=[user_id, upload.path, upload.sha256]
         )
 
     return {"status": "processing", "count": len(files)}
@@ -113,6 +227,11 @@ async def delete_photos(
         raw_paths.append(photo.thumbnail_url)
 
     await user_db_interface.delete_one(session, photo_id)
+    await profile_cache.invalidate(user_id)
+
+    if photo.blob_sha256:
+        celery_app.send_task("celery_tasks.delete_media", args=[photo.url, photo.blob_sha256])
+        return
 
     for p in raw_paths:
         if os.path.isabs(p):
@@ -121,7 +240,7 @@ async def delete_photos(
             rel = p.lstrip("/")
             full_path = os.path.join(settings.base_dir, rel)
         celery_app.send_task(
-            "celery_tasks.delete_media.delete_media",
+            "celery_tasks.delete_media",
             args=[full_path]
         )
 
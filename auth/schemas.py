@@ -1,7 +1,8 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 from fastapi_users import schemas
+from pydantic import BaseModel
 
 
 class UserRead(schemas.BaseUser[int]):
@@ -27,3 +28,50 @@ class UserCreate(schemas.BaseUserCreate):
     is_active: Optional[bool] = True
     is_superuser: Optional[bool] = False
     is_verified: Optional[bool] = False
+
+
+class UserSummary(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class UsersPage(BaseModel):
+    items: List[UserSummary]
+    next_cursor: Optional[int] = None
+
+
+class FollowSuggestion(BaseModel):
+    user: UserSummary
+    score: int
+
+
+class FollowIntersection(BaseModel):
+    count: int
+    users: List[UserSummary]
+
+
+class GalleryThumbnail(BaseModel):
+    id: int
+    url: str
+    thumbnail_url: Optional[str] = None
+
+
+class UserProfile(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    bio: Optional[str] = None
+    avatar_url: Optional[str] = None
+    registered_at: Optional[datetime] = None
+    followers_count: int
+    following_count: int
+    posts_count: int
+    communities_count: int
+    gallery: List[GalleryThumbnail]
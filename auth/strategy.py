@@ -0,0 +1,95 @@
+from typing import Optional
+
+import jwt
+from fastapi_users import exceptions
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+
+from auth.models import User
+from auth.principal_cache import principal_cache
+from auth.revocation import revocation_filter
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """
+    JWT-стратегия без обращения к БД на горячем пути:
+    пользователь берётся из PrincipalCache, SELECT только при промахе.
+
+    В токен пишется claim "ver" = user.token_version. Увеличение token_version
+    (смена пароля, деактивация) делает все ранее выданные токены недействительными.
+    """
+
+    def decode(self, token: Optional[str], user_manager) -> Optional[tuple[int, dict]]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            return user_manager.parse_id(data["sub"]), data
+        except (jwt.PyJWTError, KeyError, exceptions.InvalidID):
+            return None
+
+    async def read_token(self, token: Optional[str], user_manager) -> Optional[User]:
+        decoded = self.decode(token, user_manager)
+        if decoded is None:
+            return None
+        user_id, data = decoded
+        # Токены, выпущенные до появления версии, считаются версией 0
+        version = data.get("ver", 0)
+
+        snapshot = await principal_cache.get(user_id)
+        if snapshot is not None and snapshot["token_version"] == version:
+            return await principal_cache.attach(user_manager.user_db.session, snapshot)
+
+        try:
+            user = await user_manager.get(user_id)
+        except exceptions.UserNotExists:
+            return None
+
+        await principal_cache.set(user)
+        if user.token_version != version:
+            return None
+        return user
+
+    def claims(self, user: User) -> dict:
+        return {"sub": str(user.id), "aud": self.token_audience, "ver": user.token_version}
+
+    async def write_token(self, user: User) -> str:
+        return generate_jwt(self.claims(user), self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+
+class StatelessJWTStrategy(CachedJWTStrategy):
+    """
+    Режим JWT_STATELESS: всё, что нужно обработчикам (id, is_active, is_superuser,
+    is_verified, token_version), лежит в самом токене, и проверка не ходит ни в кэш, ни в БД.
+    Отзыв проверяется по локальной копии Bloom-фильтра RevocationFilter;
+    при возможном совпадении токен проверяется обычным путём CachedJWTStrategy.
+    """
+
+    async def read_token(self, token: Optional[str], user_manager) -> Optional[User]:
+        decoded = self.decode(token, user_manager)
+        if decoded is None:
+            return None
+        user_id, data = decoded
+
+        # Токен выпущен без stateless-claims или, возможно, отозван — полная проверка
+        if "act" not in data or await revocation_filter.might_be_revoked(user_id, data.get("ver", 0)):
+            return await super().read_token(token, user_manager)
+
+        return await principal_cache.attach(
+            user_manager.user_db.session,
+            {
+                "id": user_id,
+                "is_active": data["act"],
+                "is_superuser": data.get("su", False),
+                "is_verified": data.get("vrf", False),
+                "token_version": data.get("ver", 0)
+            }
+        )
+
+    def claims(self, user: User) -> dict:
+        return {
+            **super().claims(user),
+            "act": user.is_active,
+            "su": user.is_superuser,
+            "vrf": user.is_verified
+        }
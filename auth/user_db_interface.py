@@ -1,7 +1,13 @@
-from sqlalchemy import select, delete
+from typing import Optional
+
+from sqlalchemy import func, select, delete, insert, literal, or_, update, exists, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.models import UserGallery, User
+from auth.models import UserGallery, User, UserFollowSuggestion, user_subscriptions
+from comments.models import Comment, CommentImages
+from communities.models import Community, CommunityMembership
+from posts.models import Post, PostImages
+from search import text_match, text_rank
 
 
 class UserDBInterface:
@@ -17,9 +23,180 @@ class UserDBInterface:
         await session.execute(delete(UserGallery).where(UserGallery.id == photo_id))
         await session.commit()
 
+    async def fetch_blobs(self, session: AsyncSession, user_id: int):
+        """
+        (вид, url, blob_sha256) изображений, которые удаляются каскадом вместе с пользователем:
+        галерея, изображения его постов и комментариев, а также чужих комментариев к его постам.
+        Ссылки на media_blob нужно отпустить после commit.
+        """
+        gallery = select(literal("gallery"), UserGallery.url, UserGallery.blob_sha256).where(
+            UserGallery.user_id == user_id,
+            UserGallery.blob_sha256.is_not(None)
+        )
+        post_images = (
+            select(literal("post"), PostImages.url, PostImages.blob_sha256)
+            .join(Post, Post.id == PostImages.post_id)
+            .where(Post.user_id == user_id, PostImages.blob_sha256.is_not(None))
+        )
+        comment_images = (
+            select(literal("comment"), CommentImages.url, CommentImages.blob_sha256)
+            .join(Comment, Comment.id == CommentImages.comment_id)
+            .join(Post, Post.id == Comment.post_id)
+            .where(
+                or_(Comment.user_id == user_id, Post.user_id == user_id),
+                CommentImages.blob_sha256.is_not(None)
+            )
+        )
+        result = await session.execute(gallery.union_all(post_images, comment_images))
+        return result.all()
+
 
 class UserInterface:
     async def fetch_one(self, session: AsyncSession, user_id:int):
         user = select(User).where(User.id == user_id)
         result = await session.execute(user)
-        return result.scalars().first()
\ No newline at end of file
+        return result.scalars().first()
+
+    async def search(self, session: AsyncSession, query: str, limit: int):
+        """Поиск активных пользователей по username (подстрока/опечатка)."""
+        dialect = session.get_bind().dialect.name
+        result = await session.execute(
+            select(User)
+            .where(User.is_active, text_match(User.username, query, dialect))
+            .order_by(*text_rank(User.username, query, dialect), User.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def fetch_profile(self, session: AsyncSession, user_id: int, gallery_limit: int) -> Optional[dict]:
+        """
+        Профиль одним SELECT: колонки пользователя и счётчики подписок, скалярные подзапросы
+        для числа постов (ix_post_user_id) и сообществ (PK membership), последние фото галереи
+        через LEFT JOIN на подзапрос с LIMIT. Пользователь повторяется в каждой строке фото.
+        """
+        posts_count = (
+            select(func.count()).select_from(Post).where(Post.user_id == User.id).scalar_subquery()
+        )
+        communities_count = (
+            select(func.count())
+            .select_from(CommunityMembership)
+            .join(Community, Community.id == CommunityMembership.community_id)
+            .where(CommunityMembership.user_id == User.id, Community.is_deleting.is_(False))
+            .scalar_subquery()
+        )
+        gallery = (
+            select(UserGallery.id, UserGallery.url, UserGallery.thumbnail_url)
+            .where(UserGallery.user_id == user_id)
+            .order_by(UserGallery.uploaded_at.desc(), UserGallery.id.desc())
+            .limit(gallery_limit)
+            .subquery()
+        )
+
+        result = await session.execute(
+            select(
+                User.id,
+                User.username,
+                User.first_name,
+                User.last_name,
+                User.bio,
+                User.avatar_url,
+                User.registered_at,
+                User.followers_count,
+                User.following_count,
+                posts_count.label("posts_count"),
+                communities_count.label("communities_count"),
+                gallery.c.id.label("photo_id"),
+                gallery.c.url.label("photo_url"),
+                gallery.c.thumbnail_url.label("photo_thumbnail_url")
+            )
+            .outerjoin(gallery, true())
+            .where(User.id == user_id, User.is_active)
+        )
+        rows = result.mappings().all()
+        if not rows:
+            return None
+
+        profile = {
+            key: value for key, value in rows[0].items() if not key.startswith("photo_")
+        }
+        profile["gallery"] = [
+            {"id": row["photo_id"], "url": row["photo_url"], "thumbnail_url": row["photo_thumbnail_url"]}
+            for row in rows
+            if row["photo_id"] is not None
+        ]
+        return profile
+
+
+class SubscriptionDBInterface:
+    """Подписки между пользователями: точечные запросы по PK (follower_id, following_id)."""
+
+    async def unfollow(self, session: AsyncSession, follower_id: int, following_id: int) -> bool:
+        """Удаляет подписку, если она была. Возвращает True, если строка удалена."""
+        result = await session.execute(
+            delete(user_subscriptions).where(
+                user_subscriptions.c.follower_id == follower_id,
+                user_subscriptions.c.following_id == following_id
+            )
+        )
+        if not result.rowcount:
+            return False
+        await self.change_counts(session, follower_id, following_id, -1)
+        return True
+
+    async def follow(self, session: AsyncSession, follower_id: int, following_id: int):
+        await session.execute(
+            insert(user_subscriptions).values(follower_id=follower_id, following_id=following_id)
+        )
+        await self.change_counts(session, follower_id, following_id, 1)
+
+    async def change_counts(self, session: AsyncSession, follower_id: int, following_id: int, delta: int):
+        """Атомарно меняет following_count подписчика и followers_count цели (без чтения строк)."""
+        await session.execute(
+            update(User).where(User.id == follower_id).values(following_count=User.following_count + delta)
+        )
+        await session.execute(
+            update(User).where(User.id == following_id).values(followers_count=User.followers_count + delta)
+        )
+
+    async def fetch_followers(self, session: AsyncSession, user_id: int, after: Optional[int], limit: int):
+        """Keyset-страница подписчиков по follower_id (индекс following_id, follower_id). Возвращает limit + 1 строк."""
+        query = (
+            select(User)
+            .join(user_subscriptions, user_subscriptions.c.follower_id == User.id)
+            .where(user_subscriptions.c.following_id == user_id)
+            .order_by(user_subscriptions.c.follower_id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(user_subscriptions.c.follower_id > after)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def fetch_following(self, session: AsyncSession, user_id: int, after: Optional[int], limit: int):
+        """Keyset-страница подписок по following_id (первичный ключ). Возвращает limit + 1 строк."""
+        query = (
+            select(User)
+            .join(user_subscriptions, user_subscriptions.c.following_id == User.id)
+            .where(user_subscriptions.c.follower_id == user_id)
+            .order_by(user_subscriptions.c.following_id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(user_subscriptions.c.following_id > after)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def fetch_suggestions(self, session: AsyncSession, user_id: int, limit: int):
+        """Предрассчитанные подсказки без тех, на кого пользователь подписался после расчёта."""
+        already_following = exists().where(
+            user_subscriptions.c.follower_id == user_id,
+            user_subscriptions.c.following_id == UserFollowSuggestion.suggested_user_id
+        )
+        result = await session.execute(
+            select(User, UserFollowSuggestion.score)
+            .join(UserFollowSuggestion, UserFollowSuggestion.suggested_user_id == User.id)
+            .where(UserFollowSuggestion.user_id == user_id, ~already_following)
+            .order_by(UserFollowSuggestion.score.desc(), User.id)
+            .limit(limit)
+        )
+        return result.all()
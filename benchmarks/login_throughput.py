@@ -0,0 +1,94 @@
+"""
+Бенчмарк логина: пропускная способность проверки паролей и задержка event loop.
+
+Запускает --logins проверок пароля с параллельностью --concurrency двумя способами:
+inline (как раньше — verify_and_update прямо в корутине) и через PasswordHashingPool.
+Параллельно корутина-пульс раз в 5 мс замеряет, насколько опаздывает event loop —
+это латентность, которую во время шторма логинов получают все остальные запросы воркера.
+
+    python -m benchmarks.login_throughput --logins 400 --concurrency 50 --workers 4
+
+БД не нужна: замеряется только CPU-часть логина.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import HTTPException
+from fastapi_users.password import PasswordHelper
+
+from auth.password import PasswordHashingPool
+
+HEARTBEAT_SECONDS = 0.005
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(time.perf_counter() - started - HEARTBEAT_SECONDS)
+
+
+async def run(mode: str, helper: PasswordHelper, hashed: str, args) -> None:
+    pool = PasswordHashingPool(workers=args.workers, max_queue=args.max_queue, helper=helper)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with semaphore:
+            if mode == "inline":
+                helper.verify_and_update("hard_password", hashed)
+                # Даём event loop шанс переключиться, как это было бы между запросами
+                await asyncio.sleep(0)
+                return
+            try:
+                await pool.verify_and_update("hard_password", hashed)
+            except HTTPException:
+                rejected += 1
+
+    lags = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(heartbeat(lags, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    pool.executor.shutdown()
+
+    print(f"[{mode}]")
+    print(f"  logins/s: {args.logins / elapsed:.1f}")
+    if lags:
+        print(f"  loop lag p50: {statistics.median(lags) * 1000:.2f} ms")
+        print(f"  loop lag p99: {percentile(lags, 0.99) * 1000:.2f} ms")
+        print(f"  loop lag max: {max(lags) * 1000:.2f} ms")
+    if mode == "pool":
+        print(f"  pool: {pool.stats()}")
+        print(f"  rejected: {rejected}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=400, help="сколько проверок пароля выполнить")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных логинов")
+    parser.add_argument("--workers", type=int, default=4, help="потоков в пуле")
+    parser.add_argument("--max-queue", type=int, default=0, help="предельная очередь пула (0 — без предела)")
+    args = parser.parse_args()
+
+    helper = PasswordHelper()
+    hashed = helper.hash("hard_password")
+
+    for mode in ("inline", "pool"):
+        asyncio.run(run(mode, helper, hashed, args))
+
+
+if __name__ == "__main__":
+    main()
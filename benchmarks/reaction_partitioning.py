@@ -0,0 +1,106 @@
+"""
+Бенчмарк таблиц реакций: латентность тоггла лайка и время VACUUM.
+
+Запускается против БД из настроек (DB_* переменные окружения) до и после
+миграции 5fa7f11f9466 (партиционирование likes/dislike), чтобы сравнить:
+
+    alembic downgrade 6b06469ef525
+    python -m benchmarks.reaction_partitioning --seed 2000000
+    alembic upgrade 5fa7f11f9466
+    python -m benchmarks.reaction_partitioning --seed 2000000
+
+Служебные строки создаются с content_type = 'benchmark' (на них не висят
+триггеры счётчиков) и удаляются в конце прогона.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from settings import get_sync_engine
+
+
+def seed_likes(connection, user_id: int, rows: int, content_ids: int) -> None:
+    connection.execute(
+        text("""
+        INSERT INTO likes (user_id, content_id, content_type)
+        SELECT :user_id, (random() * :content_ids)::int, 'benchmark'
+        FROM generate_series(1, :rows)
+        """),
+        {"user_id": user_id, "rows": rows, "content_ids": content_ids}
+    )
+
+
+def toggle_like(connection, user_id: int, post_id: int) -> float:
+    """Один тоггл так же, как его делает ReactionDBInterface: поиск, затем INSERT или DELETE."""
+    started = time.perf_counter()
+    with connection.begin():
+        existing = connection.execute(
+            text("""
+            SELECT id FROM likes
+            WHERE user_id = :user_id AND content_id = :post_id AND content_type = 'post'
+            """),
+            {"user_id": user_id, "post_id": post_id}
+        ).scalar()
+        if existing is None:
+            connection.execute(
+                text("INSERT INTO likes (user_id, content_id, content_type) VALUES (:user_id, :post_id, 'post')"),
+                {"user_id": user_id, "post_id": post_id}
+            )
+        else:
+            connection.execute(
+                text("DELETE FROM likes WHERE id = :id AND content_id = :post_id"),
+                {"id": existing, "post_id": post_id}
+            )
+    return time.perf_counter() - started
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="сколько служебных лайков добавить перед замером")
+    parser.add_argument("--toggles", type=int, default=5000, help="количество тогглов")
+    args = parser.parse_args()
+
+    engine = get_sync_engine()
+
+    with engine.connect() as connection:
+        with connection.begin():
+            user_ids = connection.execute(text('SELECT id FROM "user" LIMIT 100')).scalars().all()
+            post_ids = connection.execute(text("SELECT id FROM post LIMIT 1000")).scalars().all()
+        if not user_ids or not post_ids:
+            raise SystemExit("Нужен хотя бы один пользователь и один пост")
+
+        if args.seed:
+            with connection.begin():
+                seed_likes(connection, user_ids[0], args.seed, max(post_ids) * 100)
+
+        latencies = []
+        for _ in range(args.toggles // 2):
+            # Тогглим парами, чтобы после прогона реакции на постах остались прежними
+            user_id, post_id = random.choice(user_ids), random.choice(post_ids)
+            latencies.append(toggle_like(connection, user_id, post_id))
+            latencies.append(toggle_like(connection, user_id, post_id))
+
+        with connection.begin():
+            connection.execute(text("DELETE FROM likes WHERE content_type = 'benchmark'"))
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        started = time.perf_counter()
+        connection.execute(text("VACUUM ANALYZE likes"))
+        vacuum_seconds = time.perf_counter() - started
+
+    print(f"toggles: {len(latencies)}")
+    print(f"toggle p50: {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"toggle p95: {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"toggle p99: {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"VACUUM ANALYZE likes: {vacuum_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
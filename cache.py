@@ -0,0 +1,82 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+logger = logging.getLogger("app_logger")
+
+# Маркер промаха: None — валидное закэшированное значение
+MISSING = object()
+
+_local_caches: list["LocalTTLCache"] = []
+
+
+class LocalTTLCache:
+    """
+    LRU-кэш в памяти процесса с TTL записей.
+    Первый уровень перед Redis: короткий TTL ограничивает устаревание между воркерами.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        _local_caches.append(self)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+
+def clear_local_caches():
+    """Сбрасывает все локальные кэши процесса (используется в тестах)."""
+    for local_cache in _local_caches:
+        local_cache.clear()
+
+
+class RedisCircuit:
+    """
+    После ошибки Redis чтения из кэша cooldown секунд идут мимо него (сразу в БД),
+    чтобы недоступный Redis не добавлял сетевой таймаут к каждому запросу.
+    """
+
+    def __init__(self, cooldown: float = 5.0):
+        self.cooldown = cooldown
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def failed(self, exc: Exception):
+        if self.available:
+            logger.error(f"Redis unavailable, caches fall back to DB for {self.cooldown}s: {exc}")
+        self._down_until = time.monotonic() + self.cooldown
+
+
+redis_circuit = RedisCircuit()
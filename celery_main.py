@@ -20,11 +20,27 @@ from celery_tasks.delete_comment_image import delete_comment_image
 from celery_tasks.upload_post_image import upload_post_image
 from celery_tasks.delete_post_image import delete_post_image
 from celery_tasks.cleanup_temp_media import cleanup_temp_media
+from celery_tasks.flush_reaction_counters import flush_reaction_counters
+from celery_tasks.trim_reaction_events import trim_reaction_events
+from celery_tasks.delete_community import delete_community
+from celery_tasks.build_follow_suggestions import build_follow_suggestions
 
 celery_app.conf.beat_schedule = {
     "cleanup-temp=media-at-midnight": {
         "task": "celery_tasks.cleanup_temp_media",
         "schedule": crontab(hour=0, minute=0)
+    },
+    "flush-reaction-counters": {
+        "task": "celery_tasks.flush_reaction_counters",
+        "schedule": settings.reaction_counters_flush_seconds
+    },
+    "trim-reaction-events-hourly": {
+        "task": "celery_tasks.trim_reaction_events",
+        "schedule": crontab(minute=0)
+    },
+    "build-follow-suggestions-nightly": {
+        "task": "celery_tasks.build_follow_suggestions",
+        "schedule": crontab(hour=3, minute=0)
     }
 }
 
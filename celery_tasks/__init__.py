@@ -1,6 +1,7 @@
-from auth.models import User, UserGallery
+from auth.models import User, UserGallery, UserFollowSuggestion
 from posts.models import Post
 from comments.models import Comment
-from like_dislike.models import Like, Dislike
+from like_dislike.models import Like, Dislike, Reaction
 from communities.models import Community, CommunityMembership
-from categories.models import Category
\ No newline at end of file
+from categories.models import Category
+from media_storage.models import MediaBlob
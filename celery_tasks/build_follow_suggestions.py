@@ -0,0 +1,109 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+
+from celery import shared_task
+from sqlalchemy import delete, insert, select, tuple_
+
+from auth.models import UserFollowSuggestion, user_subscriptions
+from settings import get_sync_sessionmaker
+
+EDGES_CHUNK = 50_000
+USERS_CHUNK = 1_000
+
+
+class FollowGraph:
+    """
+    Граф подписок в CSR-виде на массивах array('i') — ~4 байта на связь вместо ORM-объектов.
+    followers — отсортированные id подписчиков, у followers[i] подписки
+    лежат в following[offsets[i]:offsets[i + 1]] (по возрастанию id).
+    """
+
+    def __init__(self):
+        self.followers = array("i")
+        self.offsets = array("q", [0])
+        self.following = array("i")
+
+    @classmethod
+    def load(cls, db, chunk_size: int = EDGES_CHUNK) -> "FollowGraph":
+        """Читает user_subscriptions пачками keyset-ом по первичному ключу."""
+        graph = cls()
+        last = None
+        while True:
+            query = (
+                select(user_subscriptions.c.follower_id, user_subscriptions.c.following_id)
+                .order_by(user_subscriptions.c.follower_id, user_subscriptions.c.following_id)
+                .limit(chunk_size)
+            )
+            if last is not None:
+                query = query.where(
+                    tuple_(user_subscriptions.c.follower_id, user_subscriptions.c.following_id) > tuple_(*last)
+                )
+            edges = db.execute(query).all()
+            if not edges:
+                break
+            for follower_id, following_id in edges:
+                if not graph.followers or graph.followers[-1] != follower_id:
+                    if graph.followers:
+                        graph.offsets.append(len(graph.following))
+                    graph.followers.append(follower_id)
+                graph.following.append(following_id)
+            last = edges[-1]
+        if graph.followers:
+            graph.offsets.append(len(graph.following))
+        return graph
+
+    def neighbours(self, user_id: int) -> array:
+        position = bisect_left(self.followers, user_id)
+        if position == len(self.followers) or self.followers[position] != user_id:
+            return array("i")
+        return self.following[self.offsets[position]:self.offsets[position + 1]]
+
+    def suggestions(self, user_id: int, top_n: int, max_degree: int) -> list[tuple[int, int]]:
+        """
+        Друзья друзей: кандидат получает +1 за каждую подписку пользователя, подписанную на него.
+        Подписки с более чем max_degree исходящими связями пропускаются — они дают шум и основную стоимость.
+        """
+        direct = self.neighbours(user_id)
+        followed = set(direct)
+        scores = Counter()
+        for friend_id in direct:
+            second_hop = self.neighbours(friend_id)
+            if len(second_hop) > max_degree:
+                continue
+            scores.update(candidate for candidate in second_hop if candidate != user_id and candidate not in followed)
+        return heapq.nlargest(top_n, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+@shared_task(name="celery_tasks.build_follow_suggestions")
+def build_follow_suggestions(top_n: int = 20, max_degree: int = 5_000):
+    """
+    Пересчитывает user_follow_suggestion для всех, у кого есть подписки:
+    граф загружается один раз, подсказки пишутся пачками по USERS_CHUNK пользователей.
+    Строки, не обновлённые в этом запуске (пользователь отписался от всех), удаляются в конце.
+    """
+    started_at = datetime.utcnow()
+    db = get_sync_sessionmaker()()
+    try:
+        graph = FollowGraph.load(db)
+
+        for start in range(0, len(graph.followers), USERS_CHUNK):
+            user_ids = graph.followers[start:start + USERS_CHUNK].tolist()
+            rows = [
+                {"user_id": user_id, "suggested_user_id": suggested_id, "score": score, "computed_at": started_at}
+                for user_id in user_ids
+                for suggested_id, score in graph.suggestions(user_id, top_n, max_degree)
+            ]
+            db.execute(delete(UserFollowSuggestion).where(UserFollowSuggestion.user_id.in_(user_ids)))
+            if rows:
+                db.execute(insert(UserFollowSuggestion), rows)
+            db.commit()
+
+        db.execute(delete(UserFollowSuggestion).where(UserFollowSuggestion.computed_at < started_at))
+        db.commit()
+    finally:
+        db.close()
+
+    return {"users": len(graph.followers), "edges": len(graph.following)}
@@ -1,14 +1,20 @@
 import os.path
+from typing import Optional
 
 from celery import shared_task
 
+from media_storage.blobs import release_media
 from settings import get_settings
 
 
 settings = get_settings()
 
 @shared_task(name="celery_tasks.delete_comment_image")
-def delete_comment_image(path: str):
+def delete_comment_image(path: str, sha256: Optional[str] = None):
+    # Общий файл из media_blob удаляется только вместе с последней ссылкой
+    if sha256:
+        return release_media(sha256)
+
     if not os.path.isabs(path):
         path = os.path.join(settings.base_dir, path)
 
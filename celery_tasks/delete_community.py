@@ -0,0 +1,78 @@
+from celery import shared_task
+from sqlalchemy import delete, func, select, update
+
+from communities.models import Community, CommunityMembership
+from posts.models import Post
+from settings import get_sync_sessionmaker
+
+BATCH_SIZE = 1000
+
+
+def deletion_task_id(community_id: int) -> str:
+    """Детерминированный id задачи: прогресс можно узнать по одному community_id."""
+    return f"delete-community-{community_id}"
+
+
+@shared_task(name="celery_tasks.delete_community", bind=True)
+def delete_community(self, community_id: int, batch_size: int = BATCH_SIZE):
+    """
+    Удаляет помеченное is_deleting сообщество пачками по batch_size строк,
+    каждая пачка — отдельная короткая транзакция:
+    1) посты сообщества отвязываются (community_id = NULL) и остаются у авторов;
+    2) удаляются членства;
+    3) удаляется сама строка сообщества.
+    Прогресс публикуется в состоянии задачи (PROGRESS), повторный запуск продолжает с места падения.
+    """
+    db = get_sync_sessionmaker()()
+    try:
+        progress = {
+            "community_id": community_id,
+            "total_posts": db.scalar(select(func.count()).where(Post.community_id == community_id)),
+            "total_members": db.scalar(
+                select(func.count()).where(CommunityMembership.community_id == community_id)
+            ),
+            "detached_posts": 0,
+            "removed_members": 0
+        }
+
+        while True:
+            batch = select(Post.id).where(Post.community_id == community_id).limit(batch_size)
+            result = db.execute(
+                update(Post)
+                .where(Post.id.in_(batch))
+                .values(community_id=None, updated_at=Post.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            if not result.rowcount:
+                break
+            progress["detached_posts"] += result.rowcount
+            self.update_state(state="PROGRESS", meta=progress)
+
+        while True:
+            batch = (
+                select(CommunityMembership.user_id)
+                .where(CommunityMembership.community_id == community_id)
+                .limit(batch_size)
+            )
+            result = db.execute(
+                delete(CommunityMembership)
+                .where(CommunityMembership.community_id == community_id, CommunityMembership.user_id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            if not result.rowcount:
+                break
+            progress["removed_members"] += result.rowcount
+            self.update_state(state="PROGRESS", meta=progress)
+
+        db.execute(
+            delete(Community)
+            .where(Community.id == community_id, Community.is_deleting.is_(True))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    return progress
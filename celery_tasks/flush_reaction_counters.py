@@ -0,0 +1,76 @@
+from celery import shared_task
+from sqlalchemy import Integer, column, func, update, values
+
+from like_dislike.counter_buffer import (
+    FLUSHED_GENERATION_KEY,
+    FLUSHING_KEY,
+    GENERATION_KEY,
+    PENDING_KEY,
+    parse_counter_deltas
+)
+from posts.models import Post
+from settings import get_redis, get_sync_sessionmaker
+
+
+@shared_task(name="celery_tasks.flush_reaction_counters")
+def flush_reaction_counters():
+    """
+    Применяет накопленные в Redis дельты likes_count/dislikes_count
+    одним UPDATE ... FROM (VALUES ...) на все затронутые посты.
+
+    Pending-хэш атомарно переименовывается во flushing-хэш с новым поколением,
+    поэтому новые тогглы продолжают писать в свежий pending. UPDATE ставит постам
+    reaction_counters_generation и пропускает посты, где поколение уже стоит, —
+    повтор после падения не применит дельту дважды. Flushing-хэш не удаляется
+    после commit (читатели сами отличают применённые посты по поколению),
+    а перезаписывается следующим флашем.
+    """
+    redis = get_redis()
+
+    generation = int(redis.get(GENERATION_KEY) or 0)
+    flushed_generation = int(redis.get(FLUSHED_GENERATION_KEY) or 0)
+
+    # Предыдущий флаш не дошёл до отметки о commit — доливаем его
+    if generation == flushed_generation or not redis.exists(FLUSHING_KEY):
+        if not redis.exists(PENDING_KEY):
+            return {"flushed_posts": 0}
+        with redis.pipeline(transaction=True) as pipe:
+            pipe.rename(PENDING_KEY, FLUSHING_KEY)
+            pipe.incr(GENERATION_KEY)
+            _, generation = pipe.execute()
+
+    deltas = parse_counter_deltas(redis.hgetall(FLUSHING_KEY))
+    if not deltas:
+        redis.set(FLUSHED_GENERATION_KEY, generation)
+        return {"flushed_posts": 0}
+
+    rows = [
+        (post_id, columns.get("likes_count", 0), columns.get("dislikes_count", 0))
+        for post_id, columns in deltas.items()
+    ]
+    post_deltas = values(
+        column("id", Integer),
+        column("likes", Integer),
+        column("dislikes", Integer),
+        name="post_deltas"
+    ).data(rows)
+
+    db = get_sync_sessionmaker()()
+    try:
+        db.execute(
+            update(Post)
+            .where(Post.id == post_deltas.c.id, Post.reaction_counters_generation < generation)
+            .values(
+                likes_count=func.greatest(Post.likes_count + post_deltas.c.likes, 0),
+                dislikes_count=func.greatest(Post.dislikes_count + post_deltas.c.dislikes, 0),
+                reaction_counters_generation=generation,
+                updated_at=Post.updated_at
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    redis.set(FLUSHED_GENERATION_KEY, generation)
+
+    return {"flushed_posts": len(rows)}
@@ -4,6 +4,8 @@ from celery import shared_task
 from sqlalchemy import update
 
 from auth.models import User
+from auth.principal_cache import invalidate_principal_sync
+from auth.profile_cache import invalidate_profile_sync
 
 from settings import get_settings
 
@@ -33,5 +35,7 @@ def process_avatar(user_id: int, input_path: str, output_dir: str):
     )
     db.commit()
     db.close()
+    invalidate_principal_sync(user_id)
+    invalidate_profile_sync(user_id)
 
     return avatar_url
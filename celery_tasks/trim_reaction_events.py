@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from like_dislike.events import trim_reaction_events as trim_stream
+from settings import get_settings
+
+
+settings = get_settings()
+
+@shared_task(name="celery_tasks.trim_reaction_events")
+def trim_reaction_events():
+    """
+    Ограничивает память под поток reactions:events:
+    по длине (REACTION_EVENTS_MAXLEN) и по возрасту (REACTION_EVENTS_MAX_AGE_SECONDS).
+    """
+    trimmed = trim_stream(
+        maxlen=settings.reaction_events_maxlen,
+        max_age_seconds=settings.reaction_events_max_age_seconds
+    )
+    return {"trimmed": trimmed}
@@ -1,18 +1,12 @@
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from comments.models import Comment, CommentImages
 
 
 class CommentsDBInterface:
     def build_select(self):
-        return (
-            select(Comment).options(
-                selectinload(Comment.likes),
-                selectinload(Comment.dislikes)
-            )
-        )
+        return select(Comment)
 
     async def fetch_all(self, session: AsyncSession):
         comments = self.build_select().order_by(Comment.id)
@@ -38,3 +32,13 @@ class CommentImagesDBInterface:
         await session.execute(delete(CommentImages).where(CommentImages.id == image_id))
         await session.commit()
 
+    async def fetch_blobs(self, session: AsyncSession, comment_id: int):
+        """(url, blob_sha256) изображений комментария — удаляются каскадом вместе с ним."""
+        result = await session.execute(
+            select(CommentImages.url, CommentImages.blob_sha256).where(
+                CommentImages.comment_id == comment_id,
+                CommentImages.blob_sha256.is_not(None)
+            )
+        )
+        return result.all()
+
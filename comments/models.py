@@ -8,8 +8,10 @@ from sqlalchemy import (
     func,
     ForeignKey,
     and_,
-    TIMESTAMP
+    TIMESTAMP,
+    JSON
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, foreign
 
 from like_dislike.models import Like, Dislike
@@ -22,6 +24,8 @@ class CommentImages(Base):
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=True)
+    # SHA-256 общего файла в media_blob (NULL у загрузок до content-addressed хранилища)
+    blob_sha256 = Column(String(64), nullable=True)
     uploaded_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     comment_id = Column(Integer, ForeignKey("comment.id"), nullable=False, index=True)
@@ -39,6 +43,8 @@ class Comment(Base):
     text = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=True)
+    # Счётчики всех видов реакций, включая лайки и дизлайки: {"like": 5, "love": 3}
+    reaction_counts = Column(JSON().with_variant(JSONB(), "postgresql"), default=dict, nullable=False)
 
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     post_id = Column(Integer, ForeignKey("post.id"), nullable=False)
@@ -69,10 +75,15 @@ class Comment(Base):
 
     @property
     def likes_count(self):
-        """Динамический подсчёт лайков комментария."""
-        return len(self.likes) if self.likes else 0
+        return (self.reaction_counts or {}).get("like", 0)
 
     @property
     def dislikes_count(self):
-        """Динамический подсчёт лайков комментария."""
-        return len(self.dislikes) if self.dislikes else 0
+        return (self.reaction_counts or {}).get("dislike", 0)
+
+    @property
+    def reactions(self):
+        """Счётчики всех видов реакций комментария — из самой строки, без чтения таблиц реакций."""
+        counts = {"like": 0, "dislike": 0}
+        counts.update(self.reaction_counts or {})
+        return counts
@@ -1,5 +1,4 @@
 import os
-import uuid
 from typing import List
 
 from fastapi import (
@@ -26,6 +25,7 @@ from settings import (
     get_async_session,
     get_settings
 )
+from uploads import save_uploads
 from dependencies import current_user
 
 router = APIRouter(
@@ -113,9 +113,13 @@ async def delete_comment(
             detail="Только автор можеть удалить комментарий."
         )
 
+    blobs = await comment_image_db_interface.fetch_blobs(session, comment_id)
     await session.delete(comment)
     await session.commit()
 
+    for url, sha256 in blobs:
+        celery_app.send_task("celery_tasks.delete_comment_image", args=[url, sha256])
+
     return {"status": "Deleted", "id": comment_id}
 
 @router_comment_images.post(
@@ -124,19 +128,13 @@ async def delete_comment(
     status_code=status.HTTP_201_CREATED
 )
 async def upload_images(comment_id: int, files: list[UploadFile] = File(...)):
-    os.makedirs(settings.media_temp_comment_images_dir, exist_ok=True)
-
-    for file in files:
-         tmp_name = f"{uuid.uuid4()}_{file.filename}"
-         tmp_path = os.path.join(settings.media_temp_comment_images_dir, tmp_name)
-
-         with open(tmp_path, "wb") as buf:
-             buf.write(await file.read())
+    uploads = await save_uploads(files, settings.media_temp_comment_images_dir)
 
-         celery_app.send_task(
-             "celery_tasks.upload_comment_image.upload_comment_image",
-             args=[comment_id, tmp_path]
-         )
+    for upload in uploads:
+        celery_app.send_task(
+            "celery_tasks.upload_comment_image.upload_comment_image",
+            args=[comment_id, upload.path, upload.sha256]
+        )
     return {"status": "processing", "count": len(files)}
 
 
@@ -162,6 +160,10 @@ async def delete_comment_images(
 
     await comment_image_db_interface.delete_one(session, image_id)
 
+    if image.blob_sha256:
+        celery_app.send_task("celery_tasks.delete_comment_image", args=[image.url, image.blob_sha256])
+        return
+
     for p in raw_paths:
         if os.path.isabs(p):
             full_path = p
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic import BaseModel
 
 
@@ -17,6 +19,7 @@ class CommentRead(BaseModel):
     post_id: int
     likes_count: int
     dislikes_count: int
+    reactions: Dict[str, int] = {}
 
     class Config:
         orm_mode = True
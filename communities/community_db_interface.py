@@ -1,32 +1,201 @@
-from sqlalchemy import select
+import base64
+import datetime
+import json
+from typing import Optional
+
+from sqlalchemy import and_, literal, select, update, tuple_, true
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from communities.models import Community, CommunityMembership
+from auth.models import User
+from communities.models import Community, CommunityMembership, CommunityRoleEnum
 from posts.models import Post
+from search import text_match, text_rank
+
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """
+    Декодирует курсор и проверяет его форму: по элементу на каждый тип из types.
+    Некорректный курсор — ValueError (эндпоинты отвечают 400), а не ошибка в SQL.
+    """
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if (
+            not isinstance(values, list)
+            or len(values) != len(types)
+            or any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(values, types))
+    ):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
 
 
 class CommunityDBInterface:
-    async def fetch_all(self, session: AsyncSession):
-        query = select(Community).order_by(Community.id)
-        result = await session.execute(query)
+    async def fetch_page(self, session: AsyncSession, sort: str, after: Optional[str], limit: int):
+        """
+        Keyset-страница каталога сообществ.
+        sort="members": по убыванию member_count (индекс member_count, id),
+        sort="name": по алфавиту (индекс name, id).
+        Возвращает (сообщества, курсор следующей страницы или None).
+        """
+        if sort == "members":
+            sort_key = (Community.member_count, Community.id)
+            query = select(Community).where(Community.is_deleting.is_(False)).order_by(
+                Community.member_count.desc(), Community.id.desc()
+            )
+            if after:
+                query = query.where(tuple_(*sort_key) < tuple_(*decode_cursor(after, int, int)))
+        else:
+            sort_key = (Community.name, Community.id)
+            query = select(Community).where(Community.is_deleting.is_(False)).order_by(Community.name, Community.id)
+            if after:
+                query = query.where(tuple_(*sort_key) > tuple_(*decode_cursor(after, str, int)))
+
+        result = await session.execute(query.limit(limit + 1))
+        communities = result.scalars().all()
+
+        next_cursor = None
+        if len(communities) > limit:
+            communities = communities[:limit]
+            last = communities[-1]
+            next_cursor = encode_cursor(*(getattr(last, column.key) for column in sort_key))
+        return communities, next_cursor
+
+    async def search(self, session: AsyncSession, query: str, limit: int):
+        """Поиск по названию: релевантность, затем популярность (member_count)."""
+        dialect = session.get_bind().dialect.name
+        result = await session.execute(
+            select(Community)
+            .where(Community.is_deleting.is_(False), text_match(Community.name, query, dialect))
+            .order_by(*text_rank(Community.name, query, dialect), Community.member_count.desc(), Community.id)
+            .limit(limit)
+        )
         return result.scalars().all()
 
-    async def fetch_one(self, session: AsyncSession, community_id: int):
+    async def change_member_count(self, session: AsyncSession, community_id: int, delta: int):
+        """Атомарно меняет денормализованный счётчик участников (без чтения строки)."""
+        await session.execute(
+            update(Community)
+            .where(Community.id == community_id)
+            .values(member_count=Community.member_count + delta)
+        )
+
+    async def fetch_one(self, session: AsyncSession, community_id: int, include_deleting: bool = False):
+        """Сообщество по id; удаляемые (is_deleting) скрыты, если не попросить явно."""
         query = select(Community).where(Community.id == community_id)
+        if not include_deleting:
+            query = query.where(Community.is_deleting.is_(False))
         result = await session.execute(query)
         return result.scalars().first()
 
 
 class CommunityMembershipDBInterface:
     async def fetch_one(self, session: AsyncSession, community_id: int, user_id: int):
-        query = select(CommunityMembership).where(
+        # Членства в удаляемом сообществе уже не действуют
+        query = select(CommunityMembership).join(CommunityMembership.community).where(
             CommunityMembership.community_id == community_id,
-            CommunityMembership.user_id == user_id
+            CommunityMembership.user_id == user_id,
+            Community.is_deleting.is_(False)
         )
         result = await session.execute(query)
         return result.scalars().first()
 
+    async def fetch_page(
+            self,
+            session: AsyncSession,
+            community_id: int,
+            role: Optional[CommunityRoleEnum],
+            after: Optional[str],
+            limit: int
+    ):
+        """
+        Keyset-страница участников сообщества по (role, user_id) — порядок индекса
+        (community_id, role, user_id): администраторы, модераторы, затем остальные.
+        Возвращает ([(роль, пользователь)], курсор следующей страницы или None).
+        """
+        query = (
+            select(CommunityMembership.role, User)
+            .join(CommunityMembership.user)
+            .where(CommunityMembership.community_id == community_id)
+            .order_by(CommunityMembership.role, CommunityMembership.user_id)
+            .limit(limit + 1)
+        )
+        if role is not None:
+            query = query.where(CommunityMembership.role == role)
+        if after:
+            after_role, after_user_id = decode_cursor(after, str, int)
+            query = query.where(
+                tuple_(CommunityMembership.role, CommunityMembership.user_id)
+                > tuple_(literal(CommunityRoleEnum[after_role], CommunityMembership.role.type), after_user_id)
+            )
+
+        members = (await session.execute(query)).all()
+
+        next_cursor = None
+        if len(members) > limit:
+            members = members[:limit]
+            last_role, last_user = members[-1]
+            next_cursor = encode_cursor(last_role.name, last_user.id)
+        return members, next_cursor
+
+    async def bulk_upsert(
+            self,
+            session: AsyncSession,
+            community_id: int,
+            roles: dict[int, CommunityRoleEnum],
+            chunk_size: int = 1000
+    ) -> tuple[int, int, list[int]]:
+        """
+        Массово добавляет участников / меняет роли через INSERT ... ON CONFLICT DO UPDATE
+        пачками по chunk_size. Администраторов не понижает. Не коммитит.
+        Возвращает (добавлено, обновлено, id несуществующих пользователей);
+        администраторы и участники, чья роль не изменилась, в "обновлено" не входят.
+        """
+        dialect = session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        user_ids = list(roles)
+        created, updated, skipped = 0, 0, []
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+
+            existing_users = set((await session.execute(select(User.id).where(User.id.in_(chunk)))).scalars())
+            current_members = set((await session.execute(
+                select(CommunityMembership.user_id).where(
+                    CommunityMembership.community_id == community_id,
+                    CommunityMembership.user_id.in_(chunk)
+                )
+            )).scalars())
+
+            skipped.extend(user_id for user_id in chunk if user_id not in existing_users)
+            rows = [
+                {"community_id": community_id, "user_id": user_id, "role": roles[user_id]}
+                for user_id in chunk if user_id in existing_users
+            ]
+            if not rows:
+                continue
+
+            statement = insert(CommunityMembership).values(rows)
+            # RETURNING отдаёт только вставленные и реально изменённые строки:
+            # администраторы и участники с той же ролью под WHERE не попадают
+            changed = set((await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[CommunityMembership.user_id, CommunityMembership.community_id],
+                    set_={"role": statement.excluded.role},
+                    where=and_(
+                        CommunityMembership.role != CommunityRoleEnum.admin,
+                        CommunityMembership.role != statement.excluded.role
+                    )
+                ).returning(CommunityMembership.user_id)
+            )).scalars())
+            created += len(changed - current_members)
+            updated += len(changed & current_members)
+
+        return created, updated, skipped
+
 
 class CommunityPostDBInterface:
     async def fetch_all(self, session: AsyncSession, community_id: int):
@@ -38,6 +207,59 @@ class CommunityPostDBInterface:
         result = await session.execute(query)
         return result.scalars().all()
 
+    async def fetch_feed(self, session: AsyncSession, user_id: int, after: Optional[str], limit: int):
+        """
+        Лента новых постов из всех сообществ пользователя, keyset по (created_at, id).
+
+        На Postgres — k-way merge: для каждого членства LATERAL берёт не больше limit + 1
+        постов из индекса (community_id, created_at, id), после чего кандидаты сливаются.
+        Стоимость первой страницы — по короткому скану индекса на сообщество,
+        независимо от общего числа постов. Остальные диалекты — community_id IN (...).
+        Возвращает (посты, курсор следующей страницы или None).
+        """
+        sort_key = tuple_(Post.created_at, Post.id)
+        keyset = true()
+        if after:
+            created_at, post_id = decode_cursor(after, str, int)
+            keyset = sort_key < tuple_(datetime.datetime.fromisoformat(created_at), post_id)
+
+        if session.get_bind().dialect.name == "postgresql":
+            top = (
+                select(Post.id, Post.created_at)
+                .where(Post.community_id == CommunityMembership.community_id, keyset)
+                .order_by(Post.created_at.desc(), Post.id.desc())
+                .limit(limit + 1)
+                .lateral("top_posts")
+            )
+            post_ids = (
+                select(top.c.id)
+                .select_from(CommunityMembership)
+                .join(CommunityMembership.community)
+                .join(top, true())
+                .where(CommunityMembership.user_id == user_id, Community.is_deleting.is_(False))
+                .order_by(top.c.created_at.desc(), top.c.id.desc())
+                .limit(limit + 1)
+            )
+            query = select(Post).where(Post.id.in_(post_ids))
+        else:
+            community_ids = (
+                select(CommunityMembership.community_id)
+                .join(CommunityMembership.community)
+                .where(CommunityMembership.user_id == user_id, Community.is_deleting.is_(False))
+            )
+            query = select(Post).where(Post.community_id.in_(community_ids), keyset).limit(limit + 1)
+
+        result = await session.execute(
+            query.options(selectinload(Post.categories)).order_by(Post.created_at.desc(), Post.id.desc())
+        )
+        posts = result.scalars().all()
+
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_cursor(posts[-1].created_at.isoformat(), posts[-1].id)
+        return posts, next_cursor
+
     async def fetch_one(self, session: AsyncSession, post_id, community_id):
         query = select(Post).options(
                 selectinload(Post.categories),
@@ -5,7 +5,9 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey,
-    Enum
+    Enum,
+    Index,
+    Boolean
 )
 from sqlalchemy.orm import relationship
 
@@ -20,6 +22,9 @@ class CommunityRoleEnum(PyEnum):
 
 class CommunityMembership(Base):
     __tablename__ = "community_membership"
+    __table_args__ = (
+        Index("ix_community_membership_community_id_role_user_id", "community_id", "role", "user_id"),
+    )
 
     user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
     community_id = Column(Integer, ForeignKey("community.id"), primary_key=True)
@@ -31,10 +36,24 @@ class CommunityMembership(Base):
 
 class Community(Base):
     __tablename__ = "community"
+    __table_args__ = (
+        Index("ix_community_member_count_id", "member_count", "id"),
+        Index("ix_community_name_id", "name", "id"),
+        Index(
+            "ix_community_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
+    # Денормализованное число участников, обновляется вместе с community_membership
+    member_count = Column(Integer, default=0, nullable=False)
+    # Сообщество скрыто и удаляется фоновой задачей celery_tasks.delete_community
+    is_deleting = Column(Boolean, default=False, nullable=False)
 
     creator_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
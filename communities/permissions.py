@@ -0,0 +1,160 @@
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.models import User
+from cache import LocalTTLCache, MISSING, redis_circuit
+from communities.community_db_interface import CommunityDBInterface, CommunityMembershipDBInterface
+from communities.models import CommunityRoleEnum
+from dependencies import current_user
+from settings import get_async_redis, get_async_session, get_settings
+
+# Закэшированное "не участник" (отличаем от промаха кэша)
+NOT_MEMBER = ""
+
+
+# Запись роли только если ни поколение сообщества, ни версия участника не сменились с момента
+# чтения из БД: иначе чтение, начатое до commit удаления/понижения, вернуло бы в кэш старую роль.
+# Версия участника живёт не меньше записи: когда она истечёт, записей с ней уже нет.
+SET_IF_UNCHANGED_LUA = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+local version = redis.call('GET', KEYS[2]) or '0'
+if generation ~= ARGV[1] or version ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[3], ARGV[1] .. ':' .. ARGV[2] .. ':' .. ARGV[3], 'EX', ARGV[4])
+if version ~= '0' then
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+return 1
+"""
+
+
+class CommunityMembershipCache:
+    """
+    Кэш ролей участников сообществ: (community_id, user_id) -> роль или "не участник".
+
+    Уровни: LRU в памяти процесса (короткий TTL) -> Redis -> БД.
+    В Redis у каждой пары свой ключ community:{id}:role:{user_id} со своим TTL,
+    значение — "<поколение сообщества>:<версия участника>:<роль>".
+    Смена участника увеличивает только его версию (community:{id}:role:{user_id}:version),
+    удаление сообщества — поколение (community:{id}:roles_generation). Записи со старыми
+    поколением или версией считаются промахом, а промах, прочитавший БД до сброса,
+    не сможет записать устаревшую роль.
+    Сбрасывается после commit при подписке/отписке, удалении участника и смене роли.
+    """
+
+    def __init__(self):
+        settings = get_settings()
+        self.ttl = settings.community_role_cache_ttl
+        self.local = LocalTTLCache(maxsize=50_000, ttl=settings.community_role_cache_local_ttl)
+        self.membership_db_interface = CommunityMembershipDBInterface()
+        self._set_if_unchanged = None
+
+    @staticmethod
+    def _generation_key(community_id: int) -> str:
+        return f"community:{community_id}:roles_generation"
+
+    @staticmethod
+    def _role_key(community_id: int, user_id: int) -> str:
+        return f"community:{community_id}:role:{user_id}"
+
+    @staticmethod
+    def _version_key(community_id: int, user_id: int) -> str:
+        return f"community:{community_id}:role:{user_id}:version"
+
+    async def get_role(self, session: AsyncSession, community_id: int, user_id: int) -> Optional[CommunityRoleEnum]:
+        cached = self.local.get((community_id, user_id))
+        keys = [
+            self._generation_key(community_id),
+            self._version_key(community_id, user_id),
+            self._role_key(community_id, user_id)
+        ]
+        generation = version = None
+
+        if cached is MISSING and redis_circuit.available:
+            try:
+                generation, version, value = await get_async_redis().mget(*keys)
+                generation, version = generation or "0", version or "0"
+                if value is not None:
+                    value_generation, value_version, role = value.split(":", 2)
+                    if (value_generation, value_version) == (generation, version):
+                        cached = role
+            except RedisError as e:
+                redis_circuit.failed(e)
+                generation = None
+
+        if cached is MISSING:
+            membership = await self.membership_db_interface.fetch_one(session, community_id, user_id)
+            cached = membership.role.value if membership else NOT_MEMBER
+            if generation is not None:
+                try:
+                    if self._set_if_unchanged is None:
+                        self._set_if_unchanged = get_async_redis().register_script(SET_IF_UNCHANGED_LUA)
+                    await self._set_if_unchanged(keys=keys, args=[generation, version, cached, self.ttl])
+                except RedisError as e:
+                    redis_circuit.failed(e)
+
+        self.local.set((community_id, user_id), cached)
+        return CommunityRoleEnum(cached) if cached else None
+
+    async def invalidate(self, community_id: int, *user_ids: int):
+        """Сбрасывает только указанных участников: роли остальных в сообществе остаются в кэше."""
+        for user_id in user_ids:
+            self.local.delete((community_id, user_id))
+        try:
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                for user_id in user_ids:
+                    # TTL не меньше, чем у записей, прочитанных до сброса
+                    pipe.incr(self._version_key(community_id, user_id))
+                    pipe.expire(self._version_key(community_id, user_id), self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+    async def invalidate_community(self, community_id: int):
+        self.local.delete_where(lambda key: key[0] == community_id)
+        # Без TTL: если поколение истечёт и начнётся заново, живая запись старого цикла снова совпадёт
+        try:
+            await get_async_redis().incr(self._generation_key(community_id))
+        except RedisError as e:
+            redis_circuit.failed(e)
+
+
+community_membership_cache = CommunityMembershipCache()
+community_db_interface = CommunityDBInterface()
+
+
+def require_community_role(
+        *roles: CommunityRoleEnum,
+        not_member_detail: str = "Вы не состоите в этом сообществе",
+        forbidden_detail: str = "Недостаточно прав в этом сообществе"
+):
+    """
+    FastAPI-зависимость проверки роли текущего пользователя в сообществе {community_id}.
+    Без аргументов пропускает любого участника. Возвращает роль пользователя.
+
+        @router.post("/{community_id}/...")
+        async def handler(role: CommunityRoleEnum = Depends(require_community_role(CommunityRoleEnum.admin))):
+    """
+    async def dependency(
+            community_id: int,
+            current_user: User = Depends(current_user),
+            session: AsyncSession = Depends(get_async_session)
+    ) -> CommunityRoleEnum:
+        role = await community_membership_cache.get_role(session, community_id, current_user.id)
+
+        if role is None:
+            # Участник всегда означает существующее сообщество, поэтому проверяем его только здесь
+            if not await community_db_interface.fetch_one(session, community_id):
+                raise HTTPException(status_code=404, detail="Сообщество не найдено")
+            raise HTTPException(status_code=403, detail=not_member_detail)
+
+        if roles and role not in roles:
+            raise HTTPException(status_code=403, detail=forbidden_detail)
+
+        return role
+
+    return dependency
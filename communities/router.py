@@ -1,9 +1,10 @@
-from typing import List
+from typing import List, Optional, Literal
 
 from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Query,
     status
 )
 from sqlalchemy import select
@@ -11,12 +12,16 @@ from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.models import User
+from auth.profile_cache import profile_cache
+from celery_main import celery_app
+from celery_tasks.delete_community import deletion_task_id
 from categories.models import Category
 from communities.community_db_interface import (
     CommunityDBInterface,
     CommunityMembershipDBInterface,
     CommunityPostDBInterface
 )
+from communities.permissions import community_membership_cache, require_community_role
 from communities.models import (
     Community,
     CommunityMembership,
@@ -26,14 +31,21 @@ from communities.schemas import (
     CreateCommunity,
     UpdateCommunity,
     ReadCommunity,
+    CommunityPage,
+    CommunityFeedPage,
+    CommunityMembersPage,
     CommunityDelete,
+    CommunityDeletionStatus,
     AssignModerator,
+    BulkMembersImport,
+    BulkMembersResult,
     RemoveUser,
     ToggleSubscription
 )
 from dependencies import current_user
+from like_dislike.counter_buffer import ReactionCounterBuffer
 from posts.models import Post
-from posts.post_db_interface import PostDBInterface
+from posts.post_db_interface import PostDBInterface, PostImagesDBInterface
 from posts.schemas import (
     PostCreate,
     PostUpdate,
@@ -51,11 +63,49 @@ community_db_interface = CommunityDBInterface()
 community_membership_db_interface = CommunityMembershipDBInterface()
 community_post_db_interface = CommunityPostDBInterface()
 post_db_interface = PostDBInterface()
+post_images_db_interface = PostImagesDBInterface()
+reaction_counter_buffer = ReactionCounterBuffer()
 
-@router.get("/all/", response_model=List[ReadCommunity], summary="Взять все сообщества")
-async def get_all_communities(session: AsyncSession = Depends(get_async_session)):
-    communities = await community_db_interface.fetch_all(session)
-    return communities
+MAX_BULK_MEMBERS = 10_000
+
+@router.get("/all/", response_model=CommunityPage, summary="Каталог сообществ")
+async def get_all_communities(
+        sort: Literal["members", "name"] = Query(default="members"),
+        after: Optional[str] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        session: AsyncSession = Depends(get_async_session)
+):
+    try:
+        communities, next_cursor = await community_db_interface.fetch_page(session, sort, after, limit)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    return {"items": communities, "next_cursor": next_cursor}
+
+
+@router.get("/search/", response_model=List[ReadCommunity], summary="Поиск сообществ")
+async def search_communities(
+        q: str = Query(..., min_length=2, max_length=100),
+        limit: int = Query(default=10, ge=1, le=50),
+        session: AsyncSession = Depends(get_async_session)
+):
+    return await community_db_interface.search(session, q, limit)
+
+
+@router.get("/feed/", response_model=CommunityFeedPage, summary="Лента постов из сообществ пользователя")
+async def get_communities_feed(
+        after: Optional[str] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        current_user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+):
+    try:
+        posts, next_cursor = await community_post_db_interface.fetch_feed(session, current_user.id, after, limit)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    await reaction_counter_buffer.apply_pending(posts)
+    return {"items": posts, "next_cursor": next_cursor}
 
 @router.get("/{community_id}/", response_model=ReadCommunity, summary="Взять сообщество")
 async def get_community(community_id: int, session: AsyncSession = Depends(get_async_session)):
@@ -75,6 +125,8 @@ async def create_community(
 ):
     community_data = data_for_new_community.dict()
     community_data["creator_id"] = current_user.id
+    # Создатель сразу становится участником-администратором
+    community_data["member_count"] = 1
 
     new_community = Community(**community_data)
     session.add(new_community)
@@ -84,6 +136,9 @@ async def create_community(
     session.add(community_membership)
     await session.commit()
     await session.refresh(community_membership)
+    # SQLite/Postgres могут переиспользовать id удалённого сообщества — сбрасываем закэшированное "не участник"
+    await community_membership_cache.invalidate_community(new_community.id)
+    await profile_cache.invalidate(current_user.id)
 
     return new_community
 
@@ -116,7 +171,12 @@ async def update_community(
     return existing_community
 
 
-@router.delete("/delete/{community_id}/", response_model=CommunityDelete, summary="Удалить сообщество")
+@router.delete(
+    "/delete/{community_id}/",
+    response_model=CommunityDelete,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Удалить сообщество"
+)
 async def delete_community(
         community_id: int,
         current_user: User = Depends(current_user),
@@ -130,10 +190,36 @@ async def delete_community(
     if existing_community.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="У вас недостаточно прав для удаления этого сообщества")
 
-    await session.delete(existing_community)
+    # Сообщество сразу скрывается, участники и посты обрабатываются пачками в Celery
+    existing_community.is_deleting = True
     await session.commit()
+    await community_membership_cache.invalidate_community(community_id)
+
+    task_id = deletion_task_id(community_id)
+    celery_app.send_task("celery_tasks.delete_community", args=[community_id], task_id=task_id)
+
+    return {"status": "Deleting", "id": community_id, "task_id": task_id}
+
+
+@router.get(
+    "/delete/{community_id}/status/",
+    response_model=CommunityDeletionStatus,
+    summary="Прогресс удаления сообщества"
+)
+async def get_community_deletion_status(
+        community_id: int,
+        current_user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)
+):
+    community = await community_db_interface.fetch_one(session, community_id, include_deleting=True)
+
+    if community and community.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="У вас недостаточно прав для удаления этого сообщества")
 
-    return {"status": "Deleted", "id": community_id}
+    result = celery_app.AsyncResult(deletion_task_id(community_id))
+    progress = result.info if isinstance(result.info, dict) else {}
+
+    return {"community_id": community_id, "state": result.state, "progress": progress}
 
 
 @router.post(
@@ -144,18 +230,13 @@ async def delete_community(
 async def assign_moderator(
     community_id: int,
     user_id: int,
-    current_user: User = Depends(current_user),
+    _: CommunityRoleEnum = Depends(require_community_role(
+        CommunityRoleEnum.admin,
+        not_member_detail="Нет прав для назначения модератора",
+        forbidden_detail="Нет прав для назначения модератора"
+    )),
     session: AsyncSession = Depends(get_async_session)
 ):
-    admin_membership = await community_membership_db_interface.fetch_one(
-        session, community_id, current_user.id
-    )
-    if not admin_membership or admin_membership.role != CommunityRoleEnum.admin:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет прав для назначения модератора"
-        )
-
     new_membership = await community_membership_db_interface.fetch_one(
         session, community_id, user_id
     )
@@ -169,6 +250,7 @@ async def assign_moderator(
 
     session.add(new_membership)
     await session.commit()
+    await community_membership_cache.invalidate(community_id, user_id)
 
     return {
         "status": "Role updated",
@@ -177,6 +259,66 @@ async def assign_moderator(
     }
 
 
+@router.get(
+    "/{community_id}/members/",
+    response_model=CommunityMembersPage,
+    summary="Участники сообщества"
+)
+async def get_community_members(
+        community_id: int,
+        role: Optional[CommunityRoleEnum] = Query(default=None),
+        after: Optional[str] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=50, ge=1, le=200),
+        session: AsyncSession = Depends(get_async_session)
+):
+    community = await community_db_interface.fetch_one(session, community_id)
+
+    if not community:
+        raise HTTPException(status_code=404, detail="Сообщество не найдено")
+
+    try:
+        members, next_cursor = await community_membership_db_interface.fetch_page(
+            session, community_id, role, after, limit
+        )
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    return {
+        "items": [{"role": member_role, "user": user} for member_role, user in members],
+        "next_cursor": next_cursor
+    }
+
+
+@router.post(
+    "/{community_id}/members/bulk/",
+    response_model=BulkMembersResult,
+    summary="Массово добавить участников и назначить роли"
+)
+async def bulk_import_members(
+        community_id: int,
+        data: BulkMembersImport,
+        _: CommunityRoleEnum = Depends(require_community_role(
+            CommunityRoleEnum.admin,
+            not_member_detail="Нет прав для управления участниками",
+            forbidden_detail="Нет прав для управления участниками"
+        )),
+        session: AsyncSession = Depends(get_async_session)
+):
+    if len(data.members) > MAX_BULK_MEMBERS:
+        raise HTTPException(status_code=413, detail=f"Не больше {MAX_BULK_MEMBERS} участников за запрос")
+
+    # При повторах user_id побеждает последняя запись
+    roles = {member.user_id: member.role for member in data.members}
+
+    added, updated, skipped = await community_membership_db_interface.bulk_upsert(session, community_id, roles)
+    if added:
+        await community_db_interface.change_member_count(session, community_id, added)
+    await session.commit()
+    await community_membership_cache.invalidate_community(community_id)
+
+    return {"community_id": community_id, "added": added, "updated": updated, "skipped_user_ids": skipped}
+
+
 @router.delete(
     "/{community_id}/remove_user/{user_id}/",
     response_model=RemoveUser,
@@ -185,25 +327,22 @@ async def assign_moderator(
 async def remove_user(
         community_id: int,
         user_id: int,
-        current_user: User = Depends(current_user),
+        current_role: CommunityRoleEnum = Depends(require_community_role()),
         session: AsyncSession = Depends(get_async_session)
 ):
-
-    current_membership = await community_membership_db_interface.fetch_one(session, community_id, current_user.id)
-
-    if not current_membership:
-        raise HTTPException(status_code=403, detail="Вы не состоите в этом сообществе")
-
     target_membership = await community_membership_db_interface.fetch_one(session, community_id, user_id)
 
     if not target_membership:
         raise HTTPException(status_code=404, detail="Пользователь не найден в сообществе")
 
-    if current_membership.role == CommunityRoleEnum.moderator and target_membership.role != CommunityRoleEnum.user:
+    if current_role == CommunityRoleEnum.moderator and target_membership.role != CommunityRoleEnum.user:
         raise HTTPException(status_code=403, detail="Модератор не может удалять администраторов или других модераторов")
 
     await session.delete(target_membership)
+    await community_db_interface.change_member_count(session, community_id, -1)
     await session.commit()
+    await community_membership_cache.invalidate(community_id, user_id)
+    await profile_cache.invalidate(user_id)
 
     return {"status": "User removed", "user_id": user_id}
 
@@ -228,7 +367,10 @@ async def toggle_subscription(
 
     if membership:
         await session.delete(membership)
+        await community_db_interface.change_member_count(session, community_id, -1)
         await session.commit()
+        await community_membership_cache.invalidate(community_id, current_user.id)
+        await profile_cache.invalidate(current_user.id)
         return {"status": "unsubscribed", "community_id": community_id}
 
     new_membership = CommunityMembership(
@@ -237,7 +379,10 @@ async def toggle_subscription(
         role=CommunityRoleEnum.user
     )
     session.add(new_membership)
+    await community_db_interface.change_member_count(session, community_id, 1)
     await session.commit()
+    await community_membership_cache.invalidate(community_id, current_user.id)
+    await profile_cache.invalidate(current_user.id)
     return {"status": "subscribed", "community_id": community_id}
 
 
@@ -246,20 +391,13 @@ async def create_post_in_community(
         community_id: int,
         post_data: PostCreate,
         current_user: User = Depends(current_user),
+        _: CommunityRoleEnum = Depends(require_community_role(
+            CommunityRoleEnum.admin,
+            CommunityRoleEnum.moderator,
+            forbidden_detail="У вас нет прав для добавления постов в это сообщество"
+        )),
         session: AsyncSession = Depends(get_async_session)
 ):
-    community = await community_db_interface.fetch_one(session, community_id)
-
-    if not community:
-        raise HTTPException(status_code=404, detail="Сообщество не найдено")
-
-    membership = await community_membership_db_interface.fetch_one(session, community_id, current_user.id)
-
-    if not membership:
-        raise HTTPException(status_code=403, detail="Вы не состоите в этом сообществе")
-
-    if membership.role not in [CommunityRoleEnum.admin, CommunityRoleEnum.moderator]:
-        raise HTTPException(status_code=403, detail="У вас нет прав для добавления постов в это сообщество")
 
     new_post = Post(
         title=post_data.title,
@@ -282,6 +420,7 @@ async def create_post_in_community(
 
     session.add(new_post)
     await session.commit()
+    await profile_cache.invalidate(current_user.id)
 
     new_post = await post_db_interface.fetch_one(session, new_post.id)
 
@@ -293,14 +432,14 @@ async def get_all_posts_in_community(
         community_id: int,
         session: AsyncSession = Depends(get_async_session)
 ):
-    community = community_db_interface.fetch_one(session, community_id)
+    community = await community_db_interface.fetch_one(session, community_id)
 
     if not community:
         raise HTTPException(status_code=404, detail="Сообщество не найдено")
 
     posts = await community_post_db_interface.fetch_all(session, community_id)
 
-    return posts
+    return await reaction_counter_buffer.apply_pending(posts)
 
 
 @router.get("/{community_id}/posts/{post_id}/", response_model=PostRead, summary="Получить пост по ID в сообществе")
@@ -319,6 +458,7 @@ async def get_post_in_community(
     if not post:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
+    await reaction_counter_buffer.apply_pending([post])
     return post
 
 
@@ -327,18 +467,14 @@ async def update_post_in_community(
         community_id: int,
         post_id: int,
         post_update: PostUpdate,
-        current_user: User = Depends(current_user),
+        _: CommunityRoleEnum = Depends(require_community_role(
+            CommunityRoleEnum.admin,
+            CommunityRoleEnum.moderator,
+            not_member_detail="Нет прав для обновления постов в этом сообществе",
+            forbidden_detail="Нет прав для обновления постов в этом сообществе"
+        )),
         session: AsyncSession = Depends(get_async_session)
 ):
-    community = await community_db_interface.fetch_one(session, community_id)
-
-    if not community:
-        raise HTTPException(status_code=404, detail="Сообщество не найдено")
-
-    membership = await community_membership_db_interface.fetch_one(session, community_id, current_user.id)
-
-    if not membership or membership.role not in [CommunityRoleEnum.admin, CommunityRoleEnum.moderator]:
-        raise HTTPException(status_code=403, detail="Нет прав для обновления постов в этом сообществе")
 
     post = await community_post_db_interface.fetch_one(session, post_id, community_id)
 
@@ -361,25 +497,26 @@ async def update_post_in_community(
 async def delete_post_in_community(
         community_id: int,
         post_id: int,
-        current_user: User = Depends(current_user),
+        _: CommunityRoleEnum = Depends(require_community_role(
+            CommunityRoleEnum.admin,
+            CommunityRoleEnum.moderator,
+            not_member_detail="Нет прав для удаления постов в этом сообществе",
+            forbidden_detail="Нет прав для удаления постов в этом сообществе"
+        )),
         session: AsyncSession = Depends(get_async_session)
 ):
-    community = await community_db_interface.fetch_one(session, community_id)
-
-    if not community:
-        raise HTTPException(status_code=404, detail="Сообщество не найдено")
-
-    membership = await community_membership_db_interface.fetch_one(session, community_id, current_user.id)
-
-    if not membership or membership.role not in [CommunityRoleEnum.admin, CommunityRoleEnum.moderator]:
-        raise HTTPException(status_code=403, detail="Нет прав для удаления постов в этом сообществе")
 
     post = await community_post_db_interface.fetch_one(session, post_id, community_id)
 
     if not post:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
+    blobs = await post_images_db_interface.fetch_blobs(session, post_id)
     await session.delete(post)
     await session.commit()
+    await profile_cache.invalidate(post.user_id)
+
+    for url, sha256 in blobs:
+        celery_app.send_task("celery_tasks.delete_post_image", args=[url, sha256])
 
     return {"status": "Post deleted", "id": post_id}
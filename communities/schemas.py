@@ -1,6 +1,10 @@
-from typing import Optional
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel
 
+from auth.schemas import UserSummary
+from communities.models import CommunityRoleEnum
+from posts.schemas import PostRead
+
 
 class BaseCommunity(BaseModel):
     name: str
@@ -13,11 +17,22 @@ class CreateCommunity(BaseCommunity):
 class ReadCommunity(BaseCommunity):
     id: int
     creator_id: int
+    member_count: int = 0
 
     class Config:
         orm_mode = True
 
 
+class CommunityPage(BaseModel):
+    items: List[ReadCommunity]
+    next_cursor: Optional[str] = None
+
+
+class CommunityFeedPage(BaseModel):
+    items: List[PostRead]
+    next_cursor: Optional[str] = None
+
+
 class UpdateCommunity(BaseCommunity):
     class Config:
         orm_mode = True
@@ -25,12 +40,45 @@ class UpdateCommunity(BaseCommunity):
 class CommunityDelete(BaseModel):
     status: str
     id: int
+    task_id: Optional[str] = None
+
+
+class CommunityDeletionStatus(BaseModel):
+    community_id: int
+    state: str
+    progress: Dict[str, Any] = {}
 
 class AssignModerator(BaseModel):
     status: str
     user_id: int
     role: str
 
+class CommunityMember(BaseModel):
+    role: CommunityRoleEnum
+    user: UserSummary
+
+
+class CommunityMembersPage(BaseModel):
+    items: List[CommunityMember]
+    next_cursor: Optional[str] = None
+
+
+class BulkMember(BaseModel):
+    user_id: int
+    role: CommunityRoleEnum = CommunityRoleEnum.user
+
+
+class BulkMembersImport(BaseModel):
+    members: List[BulkMember]
+
+
+class BulkMembersResult(BaseModel):
+    community_id: int
+    added: int
+    updated: int
+    skipped_user_ids: List[int]
+
+
 class RemoveUser(BaseModel):
     status: str
     user_id: int
@@ -0,0 +1,129 @@
+import logging
+from collections import defaultdict
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from posts.models import Post
+from settings import get_async_redis, get_settings
+
+logger = logging.getLogger("app_logger")
+
+# Хэш с накопленными дельтами: поле "<post_id>:<kind>" -> дельта
+PENDING_KEY = "reaction_counters:pending"
+# Хэш последнего флаша (см. celery_tasks.flush_reaction_counters): живёт до следующего флаша
+FLUSHING_KEY = "reaction_counters:flushing"
+# Поколение хэша FLUSHING_KEY (растёт при каждом переименовании pending -> flushing)
+GENERATION_KEY = "reaction_counters:generation"
+# Последнее поколение, чей UPDATE закоммичен в БД
+FLUSHED_GENERATION_KEY = "reaction_counters:flushed_generation"
+
+COUNTER_COLUMNS = {
+    "like": "likes_count",
+    "dislike": "dislikes_count"
+}
+
+
+def parse_counter_deltas(raw: dict[str, str]) -> dict[int, dict[str, int]]:
+    """Превращает поля хэша "<post_id>:<kind>" в {post_id: {column: delta}}."""
+    deltas = defaultdict(dict)
+    for field, value in raw.items():
+        post_id, kind = field.split(":", 1)
+        column = COUNTER_COLUMNS.get(kind)
+        if column is None or not int(value):
+            continue
+        deltas[int(post_id)][column] = int(value)
+    return deltas
+
+
+class ReactionCounterBuffer:
+    """
+    Write-behind режим для post.likes_count / post.dislikes_count.
+
+    Вместо UPDATE строки поста на каждый тоггл (триггеры trg_update_post_*),
+    дельты копятся в Redis и периодически применяются одним UPDATE.
+    При чтении к значению из БД добавляется ещё не применённая дельта.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return get_settings().reaction_counters_write_behind
+
+    async def defer_triggers(self, session: AsyncSession):
+        """
+        Отключает триггеры счётчиков в текущей транзакции.
+        Вызывается перед INSERT/DELETE реакции.
+        """
+        if not self.enabled or session.get_bind().dialect.name != "postgresql":
+            return
+        await session.execute(
+            select(func.set_config("app.reaction_counters_write_behind", "on", True))
+        )
+
+    async def push(self, session: AsyncSession, content_type: str, content_id: int, deltas: dict[str, int]):
+        """
+        Отправляет дельты счётчиков в Redis одним пайплайном (после commit).
+        Если Redis недоступен, дельта применяется к посту напрямую.
+        """
+        if not self.enabled or content_type != "post" or session.get_bind().dialect.name != "postgresql":
+            return
+        deltas = {kind: delta for kind, delta in deltas.items() if kind in COUNTER_COLUMNS}
+        if not deltas:
+            return
+
+        try:
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                for kind, delta in deltas.items():
+                    pipe.hincrby(PENDING_KEY, f"{content_id}:{kind}", delta)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Reaction counters write-behind failed, applying directly: {e}")
+            values = {
+                COUNTER_COLUMNS[kind]: func.greatest(getattr(Post, COUNTER_COLUMNS[kind]) + delta, 0)
+                for kind, delta in deltas.items()
+            }
+            await session.execute(
+                update(Post).where(Post.id == content_id).values(updated_at=Post.updated_at, **values)
+            )
+            await session.commit()
+
+    async def apply_pending(self, posts):
+        """
+        Добавляет к счётчикам постов ещё не сброшенные в БД дельты.
+        Дельты флаша добавляются только к постам, чей reaction_counters_generation
+        меньше поколения флаша: UPDATE флашера ставит поколение в той же строке,
+        поэтому уже применённая дельта не учитывается дважды.
+        """
+        if not self.enabled or not posts:
+            return posts
+
+        fields = [f"{post.id}:{kind}" for post in posts for kind in COUNTER_COLUMNS]
+        try:
+            async with get_async_redis().pipeline(transaction=True) as pipe:
+                pipe.hmget(PENDING_KEY, fields)
+                pipe.hmget(FLUSHING_KEY, fields)
+                pipe.get(GENERATION_KEY)
+                pending, flushing, generation = await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Can't read pending reaction counters: {e}")
+            return posts
+
+        generation = int(generation or 0)
+        flushed_posts = {post.id for post in posts if post.reaction_counters_generation >= generation}
+
+        raw = {}
+        for field, first, second in zip(fields, pending, flushing):
+            total = int(first or 0)
+            if int(field.split(":", 1)[0]) not in flushed_posts:
+                total += int(second or 0)
+            if total:
+                raw[field] = total
+
+        deltas = parse_counter_deltas(raw)
+        for post in posts:
+            for column, delta in deltas.get(post.id, {}).items():
+                # set_committed_value не помечает объект изменённым — при flush дельта не уйдёт в БД
+                set_committed_value(post, column, max(getattr(post, column) + delta, 0))
+        return posts
@@ -0,0 +1,119 @@
+import logging
+import time
+from typing import Callable, Optional
+
+from redis.exceptions import RedisError, ResponseError
+
+from settings import get_async_redis, get_redis, get_settings
+
+logger = logging.getLogger("app_logger")
+
+STREAM_KEY = "reactions:events"
+
+
+class ReactionEventPublisher:
+    """
+    Публикует изменения реакций в Redis Stream.
+
+    Событие компактное: user, type (post/comment), content, kind (like/dislike), op (+/-).
+    Публикация идёт после commit, все события одного тоггла уходят одним пайплайном.
+    Ошибка Redis не ломает тоггл — событие только логируется как потерянное.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return get_settings().reaction_events_enabled
+
+    async def publish(self, user_id: int, content_type: str, content_id: int, deltas: dict[str, int]):
+        if not self.enabled:
+            return
+
+        maxlen = get_settings().reaction_events_maxlen
+        try:
+            async with get_async_redis().pipeline(transaction=False) as pipe:
+                for kind, delta in deltas.items():
+                    pipe.xadd(
+                        STREAM_KEY,
+                        {
+                            "user": user_id,
+                            "type": content_type,
+                            "content": content_id,
+                            "kind": kind,
+                            "op": "+" if delta > 0 else "-"
+                        },
+                        maxlen=maxlen,
+                        approximate=True
+                    )
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Can't publish reaction events {deltas} for {content_type} {content_id}: {e}")
+
+
+class ReactionEventConsumer:
+    """
+    Синхронный помощник для Celery-воркеров: читает поток реакций пачками
+    через consumer group и подтверждает (XACK) обработанные события.
+
+    Пример задачи-потребителя:
+
+        consumer = ReactionEventConsumer("notifications", "worker-1")
+
+        @shared_task(name="celery_tasks.notify_about_reactions")
+        def notify_about_reactions():
+            return consumer.process_batch(send_notifications)
+    """
+
+    def __init__(self, group: str, consumer: str, min_idle_ms: int = 60_000):
+        self.group = group
+        self.consumer = consumer
+        # Через сколько миллисекунд неподтверждённое чужое событие можно забрать себе
+        self.min_idle_ms = min_idle_ms
+
+    def ensure_group(self):
+        try:
+            get_redis().xgroup_create(STREAM_KEY, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read_batch(self, count: int = 500, block_ms: Optional[int] = None) -> list[tuple[str, dict]]:
+        """
+        Сначала забирает зависшие события упавших потребителей (XAUTOCLAIM),
+        затем дочитывает новые (XREADGROUP >) до размера пачки.
+        """
+        redis = get_redis()
+        _, events, *_ = redis.xautoclaim(
+            STREAM_KEY, self.group, self.consumer, self.min_idle_ms, start_id="0-0", count=count
+        )
+        if len(events) < count:
+            response = redis.xreadgroup(
+                self.group, self.consumer, {STREAM_KEY: ">"}, count=count - len(events), block=block_ms
+            )
+            for _, stream_events in response or []:
+                events.extend(stream_events)
+        return events
+
+    def ack(self, event_ids: list[str]):
+        if event_ids:
+            get_redis().xack(STREAM_KEY, self.group, *event_ids)
+
+    def process_batch(self, handler: Callable[[list[tuple[str, dict]]], None], count: int = 500) -> dict:
+        """Читает пачку, передаёт её обработчику и подтверждает только после успешной обработки."""
+        self.ensure_group()
+        events = self.read_batch(count)
+        if events:
+            handler(events)
+            self.ack([event_id for event_id, _ in events])
+        return {"processed": len(events)}
+
+
+def trim_reaction_events(maxlen: Optional[int] = None, max_age_seconds: Optional[int] = None) -> int:
+    """Обрезает поток по длине и/или по возрасту событий (MINID из времени в ID события)."""
+    redis = get_redis()
+    trimmed = 0
+    if maxlen is not None:
+        trimmed += redis.xtrim(STREAM_KEY, maxlen=maxlen, approximate=True)
+    if max_age_seconds is not None:
+        min_id = f"{int((time.time() - max_age_seconds) * 1000)}-0"
+        trimmed += redis.xtrim(STREAM_KEY, minid=min_id, approximate=True)
+    return trimmed
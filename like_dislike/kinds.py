@@ -0,0 +1,50 @@
+from typing import Optional
+
+from like_dislike.models import Like, Dislike, Reaction
+
+
+class ReactionKind:
+    """
+    Вид реакции из реестра.
+
+    Лайк и дизлайк хранятся в собственных (партиционированных) таблицах,
+    а их счётчики постов — в post.likes_count / post.dislikes_count.
+    Все остальные виды живут в общей таблице reaction. Их счётчики, как и лайки/дизлайки
+    комментариев, — в JSON-карте reaction_counts у поста/комментария.
+    """
+
+    def __init__(self, name: str, emoji: str, model=Reaction, removed_message: Optional[str] = None):
+        self.name = name
+        self.emoji = emoji
+        self.model = model
+        self.removed_message = removed_message or f"Реакция {emoji} убрана"
+
+    @property
+    def uses_reaction_counts(self) -> bool:
+        return self.model is Reaction
+
+    def counted_in_reaction_counts(self, content_type: str) -> bool:
+        # У комментариев нет колонок-счётчиков: лайки и дизлайки тоже считаются в reaction_counts
+        return self.uses_reaction_counts or content_type == "comment"
+
+    def build(self, **reaction_data):
+        if self.uses_reaction_counts:
+            return self.model(kind=self.name, **reaction_data)
+        return self.model(**reaction_data)
+
+
+REACTION_KINDS: dict[str, ReactionKind] = {}
+
+
+def register_reaction_kind(kind: ReactionKind) -> ReactionKind:
+    REACTION_KINDS[kind.name] = kind
+    return kind
+
+
+register_reaction_kind(ReactionKind("like", "👍", model=Like, removed_message="Лайк убран"))
+register_reaction_kind(ReactionKind("dislike", "👎", model=Dislike, removed_message="Дизлайк убран"))
+register_reaction_kind(ReactionKind("love", "❤️"))
+register_reaction_kind(ReactionKind("laugh", "😂"))
+register_reaction_kind(ReactionKind("wow", "😮"))
+register_reaction_kind(ReactionKind("sad", "😢"))
+register_reaction_kind(ReactionKind("angry", "😡"))
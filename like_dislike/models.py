@@ -2,7 +2,8 @@ from sqlalchemy import (
     Column,
     Integer,
     ForeignKey,
-    String
+    String,
+    Index
 )
 from sqlalchemy.orm import relationship
 from settings import Base
@@ -10,6 +11,11 @@ from settings import Base
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        Index("ix_likes_user_id_content_type_content_id", "user_id", "content_type", "content_id"),
+        Index("ix_likes_content_type_content_id_id", "content_type", "content_id", "id"),
+        Index("ix_likes_user_id_content_type_id", "user_id", "content_type", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
@@ -21,6 +27,9 @@ class Like(Base):
 
 class Dislike(Base):
     __tablename__ = "dislike"
+    __table_args__ = (
+        Index("ix_dislike_user_id_content_type_content_id", "user_id", "content_type", "content_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
@@ -28,3 +37,19 @@ class Dislike(Base):
     content_type = Column(String, nullable=False)
 
     user = relationship("User", back_populates='dislikes')
+
+
+class Reaction(Base):
+    """Реакции всех остальных видов (эмодзи) из реестра like_dislike.kinds."""
+    __tablename__ = "reaction"
+    __table_args__ = (
+        Index("ix_reaction_user_id_content_type_content_id", "user_id", "content_type", "content_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    content_id = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    kind = Column(String(20), nullable=False)
+
+    user = relationship("User", back_populates="reactions")
@@ -1,14 +1,141 @@
-from sqlalchemy import select
+from typing import Optional
+
+from sqlalchemy import select, literal, union_all, or_, and_, delete, update, func, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from auth.models import User
+from comments.models import Comment
+from like_dislike.models import Like, Dislike, Reaction
+from posts.models import Post
+
+
+REACTION_STORAGE = (
+    (Like, literal("like")),
+    (Dislike, literal("dislike")),
+    (Reaction, Reaction.kind),
+)
+
+COUNTED_MODELS = {
+    "post": Post,
+    "comment": Comment
+}
+
+
+def _increment_json_counters(column, deltas: dict[str, int], dialect: str):
+    """Выражение атомарного изменения ключей JSON-карты счётчиков (значения не опускаются ниже нуля)."""
+    counts = column
+    for kind, delta in deltas.items():
+        current = func.coalesce(column[kind].as_integer(), 0)
+        if dialect == "postgresql":
+            counts = func.jsonb_set(
+                counts,
+                literal([kind], ARRAY(Text)),
+                func.to_jsonb(func.greatest(current + delta, 0))
+            )
+        else:
+            counts = func.json_set(counts, f'$."{kind}"', func.max(current + delta, 0))
+    return counts
 
 
 class ReactionDBInterface:
-    async def fetch_one(self, session, Model, reaction_data):
-        reaction = await session.execute(
-            select(Model).where(
-                Model.user_id == reaction_data.user_id,
-                Model.content_id == reaction_data.content_id,
-                Model.content_type == reaction_data.content_type
+    async def fetch_user_reaction(self, session, user_id: int, content_type: str, content_id: int):
+        """Все реакции пользователя на один пост/комментарий (вид, id) — один запрос по всем таблицам."""
+        branches = [
+            select(kind.label("kind"), Model.id).where(
+                Model.user_id == user_id,
+                Model.content_type == content_type,
+                Model.content_id == content_id
+            )
+            for Model, kind in REACTION_STORAGE
+        ]
+        result = await session.execute(union_all(*branches))
+        return result.all()
+
+    async def delete_one(self, session, Model, reaction_id: int, content_id: int):
+        """
+        Удаляет реакцию по id вместе с content_id: таблицы реакций партиционированы
+        по content_id, и условие на него оставляет в плане одну партицию.
+        """
+        await session.execute(
+            delete(Model).where(
+                Model.id == reaction_id,
+                Model.content_id == content_id
             )
         )
-        return reaction.scalars().first()
 
+    async def update_reaction_counts(self, session, content_type: str, content_id: int, deltas: dict[str, int]):
+        """Меняет счётчики в reaction_counts одним UPDATE строки поста/комментария."""
+        deltas = {kind: delta for kind, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        Model = COUNTED_MODELS[content_type]
+        counts = _increment_json_counters(Model.reaction_counts, deltas, session.get_bind().dialect.name)
+        await session.execute(
+            update(Model)
+            .where(Model.id == content_id)
+            # updated_at оставляем как есть: реакция не редактирует сам контент
+            .values(reaction_counts=counts, updated_at=Model.updated_at)
+        )
+
+    async def fetch_user_reactions(self, session, user_id: int, content_ids: dict[str, list[int]]):
+        """
+        Реакции пользователя на набор постов/комментариев одним запросом.
+        Каждая ветка UNION ALL идёт по индексу (user_id, content_type, content_id).
+        """
+        branches = []
+        for Model, kind in REACTION_STORAGE:
+            conditions = [
+                and_(Model.content_type == content_type, Model.content_id.in_(ids))
+                for content_type, ids in content_ids.items()
+                if ids
+            ]
+            if not conditions:
+                continue
+            branches.append(
+                select(
+                    kind.label("kind"),
+                    Model.content_type,
+                    Model.content_id
+                ).where(Model.user_id == user_id, or_(*conditions))
+            )
+
+        if not branches:
+            return []
+
+        result = await session.execute(union_all(*branches))
+        return result.all()
+
+    async def fetch_likers(
+            self,
+            session,
+            content_type: str,
+            content_id: int,
+            after: Optional[int],
+            limit: int
+    ):
+        """Пользователи, лайкнувшие контент: keyset по likes.id (новые первыми), один запрос."""
+        query = (
+            select(Like.id, User)
+            .join(User, User.id == Like.user_id)
+            .where(Like.content_type == content_type, Like.content_id == content_id)
+            .order_by(Like.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(Like.id < after)
+        result = await session.execute(query)
+        return result.all()
+
+    async def fetch_liked_posts(self, session, user_id: int, after: Optional[int], limit: int):
+        """Посты, лайкнутые пользователем: keyset по likes.id (новые первыми), один запрос."""
+        query = (
+            select(Like.id, Post)
+            .join(Post, Post.id == Like.content_id)
+            .where(Like.user_id == user_id, Like.content_type == "post")
+            .order_by(Like.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            query = query.where(Like.id < after)
+        result = await session.execute(query)
+        return result.all()
@@ -1,19 +1,28 @@
-from typing import Union
+from typing import List, Optional, Literal
 
 from fastapi import (
     APIRouter,
     Depends,
-    HTTPException
+    HTTPException,
+    Query
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.models import User
-from comments.models import Comment
-from like_dislike.models import Like, Dislike
-from like_dislike.reaction_db_interface import ReactionDBInterface
-from like_dislike.schemas import LikeCreate, DislikeCreate, LikeResponse, DislikeResponse
+from like_dislike.counter_buffer import ReactionCounterBuffer
+from like_dislike.events import ReactionEventPublisher
+from like_dislike.kinds import REACTION_KINDS
+from like_dislike.reaction_db_interface import ReactionDBInterface, COUNTED_MODELS
+from like_dislike.schemas import (
+    ReactionCreate,
+    ReactionKindRead,
+    MyReactions,
+    LikersPage,
+    LikedPostsPage
+)
 from posts.models import Post
-from settings import get_async_session
+from rate_limit import rate_limit
+from settings import get_async_session, get_settings
 from dependencies import current_user
 
 like_router = APIRouter(
@@ -26,48 +35,104 @@ dislike_router = APIRouter(
     tags=["Dislikes 💔"]
 )
 
+reactions_router = APIRouter(
+    prefix="/reactions",
+    tags=["Reactions 🎭"]
+)
+
 reaction_db_interface = ReactionDBInterface()
+reaction_counter_buffer = ReactionCounterBuffer()
+reaction_event_publisher = ReactionEventPublisher()
+# Один бакет на пользователя для всех тогглов реакций
+reaction_rate_limit = Depends(rate_limit("reactions", get_settings().rate_limit_reactions, by="user"))
+
+MAX_REACTION_LOOKUP_IDS = 100
 
-async def toggle_reaction(reaction_data: Union[LikeResponse, DislikeResponse], session: AsyncSession = Depends(get_async_session)):
+CONTENT_NOT_FOUND = {
+    "post": "Пост не найден",
+    "comment": "Комментарий не найден"
+}
+
+
+async def toggle_reaction(reaction_data: ReactionCreate, session: AsyncSession = Depends(get_async_session)):
     """
-    Универсальная функция для установки/снятия лайка или дизлайка.
-    - Если реакция уже стоит, то она снимается.
-    - Если реакции нет, то проверяется наличие противоположной реакции и, если она есть, удаляется,
-      после чего создаётся новая реакция.
+    Универсальная функция для установки/снятия реакции любого вида из реестра.
+    - Если реакция этого вида уже стоит, то она снимается.
+    - Если стоит реакция другого вида, она удаляется, после чего создаётся новая реакция
+      (у пользователя на один пост/комментарий не больше одной реакции).
     """
-    # Определяем, какая реакция передана, и выбираем соответствующую модель
-    if reaction_data.__class__.__name__ == "LikeCreate":
-        Model = Like
-        OppositeModel = Dislike
-        reaction_name = "лайк"
-    else:
-        Model = Dislike
-        OppositeModel = Like
-        reaction_name = 'дизлайк'
-
-    existing_reaction = await reaction_db_interface.fetch_one(session, Model, reaction_data)
-
-    existing_opposite = await reaction_db_interface.fetch_one(session, OppositeModel, reaction_data)
-
-    if existing_reaction:
-        # Если реакция уже стоит – снимаем её
-        await session.delete(existing_reaction)
-        await session.commit()
-        return {"message": f"{reaction_name.capitalize()} убран", "id": existing_reaction.id}
-    else:
-        # Если противоположная реакция существует – удаляем её
-        if existing_opposite:
-            await session.delete(existing_opposite)
-            await session.commit()
-        # Добавляем новую реакцию
-        new_reaction = Model(**reaction_data.dict())
+    kind = REACTION_KINDS[reaction_data.kind]
+    content_type, content_id = reaction_data.content_type, reaction_data.content_id
+
+    existing_reactions = await reaction_db_interface.fetch_user_reaction(
+        session, reaction_data.user_id, content_type, content_id
+    )
+
+    await reaction_counter_buffer.defer_triggers(session)
+
+    counter_deltas = {}
+    removed_id = None
+    for existing_kind, reaction_id in existing_reactions:
+        await reaction_db_interface.delete_one(
+            session, REACTION_KINDS[existing_kind].model, reaction_id, content_id
+        )
+        counter_deltas[existing_kind] = counter_deltas.get(existing_kind, 0) - 1
+        if existing_kind == kind.name:
+            removed_id = reaction_id
+
+    new_reaction = None
+    if removed_id is None:
+        new_reaction = kind.build(**reaction_data.dict(exclude={"kind"}))
         session.add(new_reaction)
-        await session.commit()
-        await session.refresh(new_reaction)
-        return new_reaction
+        counter_deltas[kind.name] = counter_deltas.get(kind.name, 0) + 1
+
+    await reaction_db_interface.update_reaction_counts(
+        session,
+        content_type,
+        content_id,
+        {
+            name: delta for name, delta in counter_deltas.items()
+            if REACTION_KINDS[name].counted_in_reaction_counts(content_type)
+        }
+    )
+    await session.commit()
+
+    await reaction_counter_buffer.push(session, content_type, content_id, counter_deltas)
+    await reaction_event_publisher.publish(reaction_data.user_id, content_type, content_id, counter_deltas)
+
+    if new_reaction is None:
+        return {"message": kind.removed_message, "id": removed_id}
+
+    await session.refresh(new_reaction)
+    return new_reaction
 
 
-@like_router.post("/post/{post_id}/like", summary="Поставить/убрать лайк на пост")
+async def toggle_content_reaction(
+        content_type: str,
+        content_id: int,
+        kind: str,
+        session: AsyncSession,
+        user: User
+):
+    content = await session.get(COUNTED_MODELS[content_type], content_id)
+    if not content:
+        raise HTTPException(status_code=404, detail=CONTENT_NOT_FOUND[content_type])
+
+    reaction_data = ReactionCreate(
+        user_id=user.id,
+        content_id=content_id,
+        content_type=content_type,
+        kind=kind
+    )
+
+    return await toggle_reaction(reaction_data, session)
+
+
+@like_router.post(
+    "/post/{post_id}/like",
+    summary="Поставить/убрать лайк на пост",
+    dependencies=[reaction_rate_limit]
+)
 async def toggle_like_post(
         post_id: int,
         session: AsyncSession = Depends(get_async_session),
@@ -78,39 +143,61 @@ async def toggle_like_post(
     - Если лайка нет -> создаёт
     - Если лайк уже есть -> удаляет
     """
+    return await toggle_content_reaction("post", post_id, "like", session, current_user)
+
+
+@like_router.get("/post/{post_id}/users", response_model=LikersPage, summary="Кто лайкнул пост")
+async def get_post_likers(
+        post_id: int,
+        after: Optional[int] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        session: AsyncSession = Depends(get_async_session)
+):
     post = await session.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Пост не найден")
 
-    like_data = LikeCreate(
-        user_id=current_user.id,
-        content_id=post_id,
-        content_type="post"
-    )
+    rows = await reaction_db_interface.fetch_likers(session, "post", post_id, after, limit)
+
+    return {
+        "items": [{"like_id": like_id, "user": user} for like_id, user in rows[:limit]],
+        "next_cursor": rows[limit - 1][0] if len(rows) > limit else None
+    }
+
+
+@like_router.get("/me/posts", response_model=LikedPostsPage, summary="Посты, которые я лайкнул")
+async def get_my_liked_posts(
+        after: Optional[int] = Query(default=None, description="next_cursor с предыдущей страницы"),
+        limit: int = Query(default=20, ge=1, le=100),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    rows = await reaction_db_interface.fetch_liked_posts(session, current_user.id, after, limit)
 
-    return await toggle_reaction(like_data, session)
+    return {
+        "items": [{"like_id": like_id, "post": post} for like_id, post in rows[:limit]],
+        "next_cursor": rows[limit - 1][0] if len(rows) > limit else None
+    }
 
 
-@like_router.post("/comment/{comment_id}/like", summary="Поставить/убрать лайк на комментарий")
+@like_router.post(
+    "/comment/{comment_id}/like",
+    summary="Поставить/убрать лайк на комментарий",
+    dependencies=[reaction_rate_limit]
+)
 async def toggle_like_comment(
         comment_id: int,
         session: AsyncSession = Depends(get_async_session),
         current_user: User = Depends(current_user),
 ):
-    comment = await session.get(Comment, comment_id)
-    if not comment:
-        raise HTTPException(status_code=404, detail="Комментарий не найден")
-
-    like_data = LikeCreate(
-        user_id=current_user.id,
-        content_id=comment_id,
-        content_type="comment"
-    )
-
-    return await toggle_reaction(like_data, session)
+    return await toggle_content_reaction("comment", comment_id, "like", session, current_user)
 
 
-@dislike_router.post("/post/{post_id}/dislike", summary="Поставить/убрать дизлайк на пост")
+@dislike_router.post(
+    "/post/{post_id}/dislike",
+    summary="Поставить/убрать дизлайк на пост",
+    dependencies=[reaction_rate_limit]
+)
 async def toggle_dislike_post(
         post_id: int,
         session: AsyncSession = Depends(get_async_session),
@@ -121,33 +208,73 @@ async def toggle_dislike_post(
     - Если дизлайка нет -> создаёт
     - Если дизлайк уже есть -> удаляет
     """
-    post = await session.get(Post, post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Пост не найден")
-
-    dislike_data = DislikeCreate(
-        user_id=current_user.id,
-        content_id=post_id,
-        content_type="post"
-    )
+    return await toggle_content_reaction("post", post_id, "dislike", session, current_user)
 
-    return await toggle_reaction(dislike_data, session)
 
-
-@dislike_router.post("/comment/{comment_id}/dislike", summary="Поставить/убрать дизлайк на комментарий")
+@dislike_router.post(
+    "/comment/{comment_id}/dislike",
+    summary="Поставить/убрать дизлайк на комментарий",
+    dependencies=[reaction_rate_limit]
+)
 async def toggle_dislike_comment(
         comment_id: int,
         session: AsyncSession = Depends(get_async_session),
         current_user: User = Depends(current_user)
 ):
-    comment = await session.get(Comment, comment_id)
-    if not comment:
-        raise HTTPException(status_code=404, detail="Комментарий не найден")
-
-    dislike_data = DislikeCreate(
-        user_id=current_user.id,
-        content_id=comment_id,
-        content_type="comment"
+    return await toggle_content_reaction("comment", comment_id, "dislike", session, current_user)
+
+
+@reactions_router.get("/kinds", response_model=List[ReactionKindRead], summary="Доступные виды реакций")
+async def get_reaction_kinds():
+    return list(REACTION_KINDS.values())
+
+
+@reactions_router.post(
+    "/{content_type}/{content_id}/{kind}",
+    summary="Поставить/убрать реакцию на пост или комментарий",
+    dependencies=[reaction_rate_limit]
+)
+async def toggle_any_reaction(
+        content_type: Literal["post", "comment"],
+        content_id: int,
+        kind: str,
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    if kind not in REACTION_KINDS:
+        raise HTTPException(status_code=404, detail="Неизвестный вид реакции")
+
+    return await toggle_content_reaction(content_type, content_id, kind, session, current_user)
+
+
+@reactions_router.get("/me", response_model=MyReactions, summary="Мои реакции на набор постов и комментариев")
+async def get_my_reactions(
+        posts: List[int] = Query(default=[]),
+        comments: List[int] = Query(default=[]),
+        session: AsyncSession = Depends(get_async_session),
+        current_user: User = Depends(current_user)
+):
+    """
+    Возвращает реакцию текущего пользователя (вид из реестра, например "like", или null)
+    для каждого запрошенного поста и комментария одним запросом к БД.
+    Пример: /reactions/me?posts=1&posts=2&comments=5
+    """
+    if len(posts) > MAX_REACTION_LOOKUP_IDS or len(comments) > MAX_REACTION_LOOKUP_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Можно запросить не более {MAX_REACTION_LOOKUP_IDS} постов и комментариев за раз"
+        )
+
+    my_reactions = {
+        "posts": dict.fromkeys(posts),
+        "comments": dict.fromkeys(comments)
+    }
+    rows = await reaction_db_interface.fetch_user_reactions(
+        session,
+        current_user.id,
+        {"post": posts, "comment": comments}
     )
+    for kind, content_type, content_id in rows:
+        my_reactions[f"{content_type}s"][content_id] = kind
 
-    return await toggle_reaction(dislike_data, session)
+    return my_reactions
@@ -1,37 +1,46 @@
-from typing import Literal
+from typing import Literal, Optional, List
 
 from pydantic import BaseModel
 
+from auth.schemas import UserSummary
+from posts.schemas import PostSummary
 
-class LikeBase(BaseModel):
+
+class ReactionCreate(BaseModel):
     user_id: int
     content_id: int
     content_type: Literal["post", "comment"]
+    kind: str
 
 
-class LikeCreate(LikeBase):
-    pass
-
-
-class LikeResponse(LikeBase):
-    id: int
+class ReactionKindRead(BaseModel):
+    name: str
+    emoji: str
 
     class Config:
         orm_mode = True
 
 
-class DislikeBase(BaseModel):
-    user_id: int
-    content_id: int
-    content_type: Literal["post", "comment"]
+class MyReactions(BaseModel):
+    posts: dict[int, Optional[str]]
+    comments: dict[int, Optional[str]]
 
 
-class DislikeCreate(DislikeBase):
-    pass
+class Liker(BaseModel):
+    like_id: int
+    user: UserSummary
 
 
-class DislikeResponse(DislikeBase):
-    id: int
+class LikersPage(BaseModel):
+    items: List[Liker]
+    next_cursor: Optional[int] = None
 
-    class Config:
-        orm_mode = True
+
+class LikedPost(BaseModel):
+    like_id: int
+    post: PostSummary
+
+
+class LikedPostsPage(BaseModel):
+    items: List[LikedPost]
+    next_cursor: Optional[int] = None
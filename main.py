@@ -1,17 +1,22 @@
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from auth.auth import auth_backend
-from auth.router import router as router_subscriptions, router_user_images
+from auth.router import router as router_subscriptions, router_user_images, router_users
 from auth.schemas import UserRead, UserCreate
 from dependencies import fastapi_users
 from logging_config import Logger
+from rate_limit import rate_limit
 from posts.router import router as router_posts, router_post_images
 from comments.router import router as router_comments, router_comment_images
-from settings import get_async_session, get_async_sessionmaker
+from settings import get_async_session, get_async_sessionmaker, get_settings
 from startup import create_seed_categories
-from like_dislike.router import like_router as router_like, dislike_router as router_dislike
+from like_dislike.router import (
+    like_router as router_like,
+    dislike_router as router_dislike,
+    reactions_router as router_reactions
+)
 from communities.router import router as router_community
 
 logger = Logger()
@@ -30,8 +35,18 @@ app.add_middleware(
 
 logger.register_global_exceprtion_handler(app)
 
+# Шторм подбора паролей упирается в лимит до дорогой проверки хэша
+login_rate_limit = rate_limit("login", get_settings().rate_limit_login)
+
+router_auth = fastapi_users.get_auth_router(auth_backend)
+# Лимит только на /login: logout не проверяет пароль и не должен тратить токены того же IP.
+# include_router пересобирает маршруты из route.dependencies, поэтому зависимость добавляем до него
+for route in router_auth.routes:
+    if route.path == "/login":
+        route.dependencies.append(Depends(login_rate_limit))
+
 app.include_router(
-    fastapi_users.get_auth_router(auth_backend),
+    router_auth,
     prefix="/auth/jwt",
     tags=["auth 🐺"]
 )
@@ -51,8 +66,10 @@ app.include_router(router_comments)
 app.include_router(router_comment_images)
 app.include_router(router_like)
 app.include_router(router_dislike)
+app.include_router(router_reactions)
 app.include_router(router_community)
 app.include_router(router_subscriptions)
+app.include_router(router_users)
 
 @app.on_event("startup")
 async def on_startup() -> None:
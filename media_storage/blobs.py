@@ -0,0 +1,154 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from media_storage.models import MediaBlob
+from settings import get_settings, get_sync_sessionmaker
+
+settings = get_settings()
+
+THUMBNAIL_SIZE = (150, 150)
+
+
+def blob_paths(sha256: str) -> tuple[Path, Path]:
+    """media/blobs/ab/abcd….jpg и media/blobs/ab/thumbnails/abcd….jpg — префикс не даёт раздуть один каталог."""
+    directory = Path(settings.media_blobs_dir) / sha256[:2]
+    return directory / f"{sha256}.jpg", directory / "thumbnails" / f"{sha256}.jpg"
+
+
+def media_url(path: Path) -> str:
+    return "/" + path.relative_to(settings.base_dir).as_posix()
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_image(source: str, final_path: Path, thumbnail_path: Path):
+    """JPEG и миниатюра; пишем во временные файлы и подменяем через os.replace, чтобы не отдать недописанный."""
+    os.makedirs(thumbnail_path.parent, exist_ok=True)
+    suffix = f".{uuid.uuid4().hex}.tmp"
+
+    with Image.open(source) as img:
+        img = img.convert("RGB")
+        img.save(f"{final_path}{suffix}", "JPEG", optimize=True)
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.save(f"{thumbnail_path}{suffix}", "JPEG", optimize=True)
+
+    os.replace(f"{final_path}{suffix}", final_path)
+    os.replace(f"{thumbnail_path}{suffix}", thumbnail_path)
+
+
+def acquire_blob(db: Session, sha256: str, temp_path: str) -> tuple[str, str]:
+    """
+    Берёт ссылку на изображение с хэшем sha256: ref_count + 1 через INSERT ... ON CONFLICT DO UPDATE.
+    Обработка (конвертация и миниатюра) выполняется, только если хэш новый или файлы пропали.
+    Строка media_blob остаётся заблокированной до commit вызывающего кода. Если последнюю ссылку
+    отпустили параллельно, строки уже нет: хэш считается новым и файлы создаются заново.
+    Возвращает (url, thumbnail_url).
+    """
+    final_path, thumbnail_path = blob_paths(sha256)
+    url, thumbnail_url = media_url(final_path), media_url(thumbnail_path)
+
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(MediaBlob).values(sha256=sha256, url=url, thumbnail_url=thumbnail_url, ref_count=1)
+    ref_count = db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[MediaBlob.sha256],
+            set_={"ref_count": MediaBlob.ref_count + 1}
+        ).returning(MediaBlob.ref_count)
+    ).scalar_one()
+
+    if ref_count == 1 or not (final_path.exists() and thumbnail_path.exists()):
+        render_image(temp_path, final_path, thumbnail_path)
+
+    return url, thumbnail_url
+
+
+def release_blob(db: Session, sha256: str) -> bool:
+    """
+    Отпускает ссылку: ref_count - 1, на последней удаляет строку.
+    Файлы не трогает: их удаляет remove_blob_files после commit. Возвращает True, если ссылка была последней.
+    """
+    ref_count = db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.sha256 == sha256)
+        .values(ref_count=MediaBlob.ref_count - 1)
+        .returning(MediaBlob.ref_count)
+    ).scalar_one_or_none()
+    if ref_count is None or ref_count > 0:
+        return False
+
+    db.execute(delete(MediaBlob).where(MediaBlob.sha256 == sha256))
+    return True
+
+
+def remove_blob_files(db: Session, sha256: str) -> bool:
+    """
+    Удаляет файлы blob после commit release_blob: при откате строка и файлы остаются согласованными.
+    Если хэш успели загрузить заново, файлы уже снова чьи-то — не трогаем. Возвращает True, если удалены.
+    """
+    if db.execute(select(MediaBlob.sha256).where(MediaBlob.sha256 == sha256)).first():
+        return False
+
+    for path in blob_paths(sha256):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return True
+
+
+def store_image(model, temp_path: str, sha256: Optional[str] = None, **fields) -> dict:
+    """
+    Общая часть задач загрузки: ссылка на blob + строка model(**fields) в одной транзакции.
+    sha256 считает эндпоинт при записи загрузки; для задач, поставленных до этого, считаем здесь.
+    """
+    sha256 = sha256 or file_sha256(temp_path)
+
+    db = get_sync_sessionmaker()()
+    try:
+        url, thumbnail_url = acquire_blob(db, sha256, temp_path)
+        item = model(url=url, thumbnail_url=thumbnail_url, blob_sha256=sha256, **fields)
+        db.add(item)
+        db.commit()
+
+        result = {
+            "id": item.id,
+            "url": item.url,
+            "thumbnail_url": item.thumbnail_url
+        }
+    finally:
+        db.close()
+
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+    return result
+
+
+def release_media(sha256: str) -> dict:
+    """Общая часть задач удаления для изображений из media_blob."""
+    db = get_sync_sessionmaker()()
+    try:
+        deleted = release_blob(db, sha256)
+        db.commit()
+        if deleted:
+            deleted = remove_blob_files(db, sha256)
+    finally:
+        db.close()
+
+    return {"status": "deleted" if deleted else "released", "sha256": sha256}
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    TIMESTAMP
+)
+
+from settings import Base
+
+
+class MediaBlob(Base):
+    """
+    Обработанное изображение, адресуемое SHA-256 исходного файла.
+    Общее для галереи, постов и комментариев: строки user_gallery / post_images / comment_images
+    ссылаются на него через blob_sha256, ref_count — число таких строк.
+    """
+    __tablename__ = "media_blob"
+
+    sha256 = Column(String(64), primary_key=True)
+    url = Column(String, nullable=False)
+    thumbnail_url = Column(String, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
@@ -14,11 +14,12 @@ from settings import (
 
 settings = get_settings()
 from posts.models import Post, post_categories, PostImages
-from auth.models import User, user_subscriptions, UserGallery
+from auth.models import User, user_subscriptions, UserGallery, UserFollowSuggestion
 from comments.models import Comment, CommentImages
 from categories.models import Category
-from like_dislike.models import Like, Dislike
+from like_dislike.models import Like, Dislike, Reaction
 from communities.models import Community
+from media_storage.models import MediaBlob
 
 target_metadata = Base.metadata
 
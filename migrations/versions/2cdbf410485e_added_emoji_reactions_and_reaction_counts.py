@@ -0,0 +1,64 @@
+"""added emoji reactions and reaction_counts
+
+Revision ID: 2cdbf410485e
+Revises: 5fa7f11f9466
+Create Date: 2026-10-19 15:20:44.318822
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2cdbf410485e'
+down_revision: Union[str, None] = '5fa7f11f9466'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Как и likes/dislike (см. 5fa7f11f9466), таблица reaction партиционирована по content_id
+PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.execute("""
+    CREATE TABLE reaction (
+        id SERIAL NOT NULL,
+        user_id INTEGER NOT NULL REFERENCES "user" (id),
+        content_id INTEGER NOT NULL,
+        content_type VARCHAR NOT NULL,
+        kind VARCHAR(20) NOT NULL,
+        CONSTRAINT reaction_pkey PRIMARY KEY (id, content_id)
+    ) PARTITION BY HASH (content_id)
+    """)
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f'CREATE TABLE reaction_p{remainder} PARTITION OF reaction '
+            f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+        )
+    op.create_index(op.f('ix_reaction_id'), 'reaction', ['id'], unique=False)
+    op.create_index(
+        'ix_reaction_user_id_content_type_content_id',
+        'reaction',
+        ['user_id', 'content_type', 'content_id'],
+        unique=False
+    )
+
+    op.add_column(
+        'post',
+        sa.Column('reaction_counts', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb"))
+    )
+    op.add_column(
+        'comment',
+        sa.Column('reaction_counts', postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb"))
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('comment', 'reaction_counts')
+    op.drop_column('post', 'reaction_counts')
+    op.drop_index('ix_reaction_user_id_content_type_content_id', table_name='reaction')
+    op.drop_index(op.f('ix_reaction_id'), table_name='reaction')
+    op.drop_table('reaction')
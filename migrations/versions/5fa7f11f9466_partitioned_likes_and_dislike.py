@@ -0,0 +1,113 @@
+"""partitioned likes and dislike
+
+Revision ID: 5fa7f11f9466
+Revises: 6b06469ef525
+Create Date: 2026-10-19 14:32:10.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5fa7f11f9466'
+down_revision: Union[str, None] = '6b06469ef525'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Количество HASH-партиций по content_id для каждой таблицы реакций
+PARTITIONS = 16
+
+REACTION_TABLES = {
+    "likes": {
+        "indexes": {
+            "ix_likes_id": ["id"],
+            "ix_likes_user_id_content_type_content_id": ["user_id", "content_type", "content_id"],
+            "ix_likes_content_type_content_id_id": ["content_type", "content_id", "id"],
+            "ix_likes_user_id_content_type_id": ["user_id", "content_type", "id"],
+        },
+        "triggers": {
+            "on_like_insert": ("INSERT", "NEW", "trg_update_post_likes"),
+            "on_like_delete": ("DELETE", "OLD", "trg_update_post_likes"),
+        },
+    },
+    "dislike": {
+        "indexes": {
+            "ix_dislike_id": ["id"],
+            "ix_dislike_user_id_content_type_content_id": ["user_id", "content_type", "content_id"],
+        },
+        "triggers": {
+            "on_dislike_insert": ("INSERT", "NEW", "trg_update_post_dislikes"),
+            "on_dislike_delete": ("DELETE", "OLD", "trg_update_post_dislikes"),
+        },
+    },
+}
+
+
+def _rebuild(table: str, partitioned: bool) -> None:
+    """
+    Пересоздаёт таблицу реакций (партиционированной или обычной) с переносом данных.
+    Последовательность id сохраняется, индексы и триггеры счётчиков пересоздаются
+    после копирования, чтобы перенос строк не менял post.likes_count/dislikes_count.
+    """
+    spec = REACTION_TABLES[table]
+    old_table = f"{table}_old"
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {old_table}')
+    op.execute(f'ALTER TABLE {old_table} RENAME CONSTRAINT {table}_pkey TO {old_table}_pkey')
+    for index_name in spec["indexes"]:
+        op.execute(f'DROP INDEX IF EXISTS {index_name}')
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY NONE')
+
+    if partitioned:
+        # PK партиционированной таблицы обязан включать ключ партиционирования
+        primary_key, partition_clause = "id, content_id", "PARTITION BY HASH (content_id)"
+    else:
+        primary_key, partition_clause = "id", ""
+
+    op.execute(f"""
+    CREATE TABLE {table} (
+        id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'),
+        user_id INTEGER NOT NULL REFERENCES "user" (id),
+        content_id INTEGER NOT NULL,
+        content_type VARCHAR NOT NULL,
+        CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})
+    ) {partition_clause}
+    """)
+    if partitioned:
+        for remainder in range(PARTITIONS):
+            op.execute(
+                f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+            )
+
+    op.execute(f"""
+    INSERT INTO {table} (id, user_id, content_id, content_type)
+    SELECT id, user_id, content_id, content_type FROM {old_table}
+    """)
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old_table}')
+
+    for index_name, columns in spec["indexes"].items():
+        op.create_index(index_name, table, columns, unique=False)
+
+    for trigger_name, (event, row, function) in spec["triggers"].items():
+        op.execute(f"""
+        CREATE TRIGGER {trigger_name}
+          AFTER {event} ON {table}
+          FOR EACH ROW
+          WHEN ({row}.content_type = 'post')
+          EXECUTE FUNCTION {function}();
+        """)
+
+
+def upgrade() -> None:
+    for table in REACTION_TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    for table in REACTION_TABLES:
+        _rebuild(table, partitioned=False)
@@ -0,0 +1,51 @@
+"""write-behind switch for post reaction triggers
+
+Revision ID: b7cb8a03d645
+Revises: f0f00952a601
+Create Date: 2026-10-19 13:41:52.118304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7cb8a03d645'
+down_revision: Union[str, None] = 'f0f00952a601'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counter_function(name: str, column: str, write_behind_switch: bool) -> str:
+    # В write-behind режиме приложение выставляет app.reaction_counters_write_behind = 'on'
+    # в транзакции тоггла, и счётчик обновляет флашер, а не триггер.
+    switch = """
+        IF current_setting('app.reaction_counters_write_behind', true) = 'on' THEN
+            RETURN NULL;
+        END IF;
+    """ if write_behind_switch else ""
+    return f"""
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+    BEGIN
+        {switch}
+        IF TG_OP = 'INSERT' THEN
+            UPDATE post SET {column} = {column} + 1 WHERE id = NEW.content_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE post SET {column} = GREATEST({column} - 1, 0) WHERE id = OLD.content_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """
+
+
+def upgrade() -> None:
+    op.execute(_counter_function("trg_update_post_likes", "likes_count", True))
+    op.execute(_counter_function("trg_update_post_dislikes", "dislikes_count", True))
+
+
+def downgrade() -> None:
+    op.execute(_counter_function("trg_update_post_likes", "likes_count", False))
+    op.execute(_counter_function("trg_update_post_dislikes", "dislikes_count", False))
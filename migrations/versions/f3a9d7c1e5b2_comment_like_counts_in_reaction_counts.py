@@ -0,0 +1,31 @@
+"""comment like/dislike counts in reaction_counts
+
+Revision ID: f3a9d7c1e5b2
+Revises: e8c1f4a2b6d3
+Create Date: 2026-10-21 11:02:37.904215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d7c1e5b2'
+down_revision: Union[str, None] = 'e8c1f4a2b6d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Счётчики лайков/дизлайков комментариев теперь ведёт тоггл реакции — заполняем текущими значениями
+    op.execute("""
+    UPDATE comment SET reaction_counts = reaction_counts || jsonb_build_object(
+        'like', (SELECT count(*) FROM likes WHERE content_type = 'comment' AND content_id = comment.id),
+        'dislike', (SELECT count(*) FROM dislike WHERE content_type = 'comment' AND content_id = comment.id)
+    )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE comment SET reaction_counts = reaction_counts - 'like' - 'dislike'")
@@ -9,8 +9,11 @@ from sqlalchemy import (
     func,
     Table,
     and_,
-    TIMESTAMP
+    TIMESTAMP,
+    JSON,
+    Index
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, foreign
 
 from like_dislike.models import Like, Dislike
@@ -32,6 +35,8 @@ class PostImages(Base):
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=True)
+    # SHA-256 общего файла в media_blob (NULL у загрузок до content-addressed хранилища)
+    blob_sha256 = Column(String(64), nullable=True)
     uploaded_at = Column(TIMESTAMP, default=datetime.datetime.utcnow)
 
     post_id = Column(Integer, ForeignKey("post.id"), nullable=False, index=True)
@@ -44,6 +49,10 @@ class PostImages(Base):
 
 class Post(Base):
     __tablename__ = "post"
+    __table_args__ = (
+        Index("ix_post_community_id_created_at_id", "community_id", "created_at", "id"),
+        Index("ix_post_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -52,6 +61,11 @@ class Post(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=True)
     likes_count = Column(Integer, default=0, nullable=False)
     dislikes_count = Column(Integer, default=0, nullable=False)
+    # Поколение write-behind флаша, последним применённого к likes_count/dislikes_count
+    # (см. like_dislike.counter_buffer): дельты этого и более ранних флашей уже в счётчиках
+    reaction_counters_generation = Column(Integer, default=0, server_default="0", nullable=False)
+    # Счётчики реакций-эмодзи: {"love": 3, "wow": 1}
+    reaction_counts = Column(JSON().with_variant(JSONB(), "postgresql"), default=dict, nullable=False)
 
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     community_id = Column(Integer, ForeignKey("community.id"), nullable=True)
@@ -81,3 +95,10 @@ class Post(Base):
         back_populates="post",
         cascade="all, delete-orphan"
     )
+
+    @property
+    def reactions(self):
+        """Счётчики всех видов реакций поста из одной строки."""
+        counts = {"like": self.likes_count, "dislike": self.dislikes_count}
+        counts.update(self.reaction_counts or {})
+        return counts
@@ -3,6 +3,7 @@ from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from comments.models import Comment, CommentImages
 from posts.models import Post, PostImages
 
 
@@ -43,4 +44,21 @@ class PostImagesDBInterface:
         await session.execute(delete(PostImages).where(PostImages.id == image_id))
         await session.commit()
 
+    async def fetch_blobs(self, session: AsyncSession, post_id: int):
+        """
+        (url, blob_sha256) изображений поста и его комментариев: их строки удаляются каскадом
+        вместе с постом, и ссылки на media_blob нужно отпустить после commit.
+        """
+        post_images = select(PostImages.url, PostImages.blob_sha256).where(
+            PostImages.post_id == post_id,
+            PostImages.blob_sha256.is_not(None)
+        )
+        comment_images = (
+            select(CommentImages.url, CommentImages.blob_sha256)
+            .join(Comment, Comment.id == CommentImages.comment_id)
+            .where(Comment.post_id == post_id, CommentImages.blob_sha256.is_not(None))
+        )
+        result = await session.execute(post_images.union_all(comment_images))
+        return result.all()
+
 
@@ -1,5 +1,4 @@
 import os
-import uuid
 from typing import List
 
 from fastapi import (
@@ -13,8 +12,10 @@ from fastapi import (
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.models import User
+from auth.profile_cache import profile_cache
 from categories.category_db_interface import CategoryDBInterface
 from celery_main import celery_app
+from like_dislike.counter_buffer import ReactionCounterBuffer
 from posts.models import Post
 from posts.post_db_interface import PostDBInterface, PostImagesDBInterface
 from posts.schemas import (
@@ -26,6 +27,7 @@ from settings import (
     get_async_session,
     get_settings
 )
+from uploads import save_uploads
 from dependencies import current_user
 
 router = APIRouter(
@@ -42,12 +44,14 @@ router_post_images = APIRouter(
 post_db_interface = PostDBInterface()
 post_images_db_interface = PostImagesDBInterface()
 category_db_interface = CategoryDBInterface()
+reaction_counter_buffer = ReactionCounterBuffer()
 settings = get_settings()
 
 @router.get("/all/", response_model=List[PostRead], summary="Получить все посты")
 async def get_all_posts(session: AsyncSession = Depends(get_async_session)):
+    posts = await post_db_interface.fetch_all(session)
 
-    return await post_db_interface.fetch_all(session)
+    return await reaction_counter_buffer.apply_pending(posts)
 
 
 @router.get('/{post_id}/', response_model=PostRead, summary="Получить пост")
@@ -57,6 +61,7 @@ async def get_post(post_id: int, session: AsyncSession = Depends(get_async_sessi
     if not post:
         raise HTTPException(status_code=404, detail="Запись не найдена")
 
+    await reaction_counter_buffer.apply_pending([post])
     return post
 
 
@@ -67,6 +72,7 @@ async def add_post(new_post: PostCreate, session: AsyncSession = Depends(get_asy
 
     session.add(post)
     await session.commit()
+    await profile_cache.invalidate(post.user_id)
 
     post = await post_db_interface.fetch_one(session, post.id)
 
@@ -127,8 +133,13 @@ async def delete_post(
             detail="Только автор может удалить пост"
         )
 
+    blobs = await post_images_db_interface.fetch_blobs(session, post_id)
     await session.delete(existing_post)
     await session.commit()
+    await profile_cache.invalidate(current_user.id)
+
+    for url, sha256 in blobs:
+        celery_app.send_task("celery_tasks.delete_post_image", args=[url, sha256])
 
     return {"status": "Deleted", "id": post_id}
 
@@ -140,18 +151,12 @@ async def delete_post(
     status_code=status.HTTP_201_CREATED
 )
 async def upload_images(post_id: int, files: list[UploadFile] = File(...)):
-    os.makedirs(settings.media_temp_post_images_dir, exist_ok=True)
-
-    for file in files:
-        tmp_name = f"{uuid.uuid4()}_{file.filename}"
-        tmp_path = os.path.join(settings.media_temp_post_images_dir, tmp_name)
-
-        with open(tmp_path, "wb") as buf:
-            buf.write(await file.read())
+    uploads = await save_uploads(files, settings.media_temp_post_images_dir)
 
+    for upload in uploads:
         celery_app.send_task(
             "celery_tasks.upload_post_image.upload_post_image",
-            args=[post_id, tmp_path]
+            args=[post_id, upload.path, upload.sha256]
         )
     return {"status": "processing", "count": len(files)}
 
@@ -178,6 +183,10 @@ async def delete_post_images(
 
     await post_images_db_interface.delete_one(session, image_id)
 
+    if image.blob_sha256:
+        celery_app.send_task("celery_tasks.delete_post_image", args=[image.url, image.blob_sha256])
+        return
+
     for p in raw_paths:
         if os.path.isabs(p):
             full_path = p
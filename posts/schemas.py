@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Dict
 import datetime
 
 from pydantic import BaseModel
@@ -26,6 +26,17 @@ class PostRead(BaseModel):
     user_id: int
     likes_count: int
     dislikes_count: int
+    reactions: Dict[str, int] = {}
+
+    class Config:
+        orm_mode = True
+
+
+class PostSummary(BaseModel):
+    id: int
+    title: str
+    created_at: datetime.datetime
+    user_id: int
 
     class Config:
         orm_mode = True
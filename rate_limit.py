@@ -0,0 +1,129 @@
+import math
+import time
+from typing import Literal, Optional
+
+from fastapi import Depends, HTTPException, Request
+from redis.exceptions import RedisError
+
+from auth.models import User
+from cache import LocalTTLCache, MISSING, redis_circuit
+from dependencies import current_user
+from settings import get_async_redis, get_settings
+
+# Token bucket: KEYS[1] — хэш {tokens, ts}, ARGV[1] — ёмкость, ARGV[2] — токенов в секунду.
+# Время берётся у Redis, чтобы часы воркеров не влияли на результат.
+# Возвращает {1, 0} если запрос пропущен, иначе {0, миллисекунд до появления токена}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, retry_after}
+"""
+
+
+def parse_limit(spec: str) -> tuple[int, float]:
+    """ "10/60" -> ёмкость 10 запросов, пополнение 10 токенов за 60 секунд."""
+    capacity, period = spec.split("/")
+    return int(capacity), float(period)
+
+
+class RateLimiter:
+    """
+    Ограничение частоты запросов по token bucket в Redis (атомарный Lua-скрипт).
+
+    Перед Redis стоит локальный фильтр: получив отказ, процесс помнит, до какого
+    момента клиент заблокирован, и до этого времени отклоняет его без сетевого запроса.
+    При недоступном Redis лимит не применяется (fail open).
+    """
+
+    def __init__(self, name: str, spec: str):
+        self.name = name
+        self.capacity, self.period = parse_limit(spec)
+        self.blocked = LocalTTLCache(maxsize=100_000, ttl=self.period)
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        return get_settings().rate_limit_enabled
+
+    def _key(self, identity: str) -> str:
+        return f"rate_limit:{self.name}:{identity}"
+
+    async def hit(self, identity: str) -> Optional[float]:
+        """Списывает токен. Возвращает None, если запрос разрешён, иначе секунды до повтора."""
+        if not self.enabled:
+            return None
+
+        blocked_until = self.blocked.get(identity)
+        if blocked_until is not MISSING:
+            retry_after = blocked_until - time.monotonic()
+            if retry_after > 0:
+                return retry_after
+            self.blocked.delete(identity)
+
+        if not redis_circuit.available:
+            return None
+        try:
+            if self._script is None:
+                self._script = get_async_redis().register_script(TOKEN_BUCKET_LUA)
+            allowed, retry_after_ms = await self._script(
+                keys=[self._key(identity)],
+                args=[self.capacity, self.capacity / self.period]
+            )
+        except RedisError as e:
+            redis_circuit.failed(e)
+            return None
+
+        if allowed:
+            return None
+        retry_after = int(retry_after_ms) / 1000
+        self.blocked.set(identity, time.monotonic() + retry_after)
+        return retry_after
+
+    async def check(self, identity: str):
+        retry_after = await self.hit(identity)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Слишком много запросов, повторите попытку позже",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+
+def rate_limit(name: str, spec: str, by: Literal["ip", "user"] = "ip"):
+    """
+    FastAPI-зависимость лимита для маршрута или целого роутера:
+
+        @router.post("/...", dependencies=[Depends(rate_limit("posts", "30/60", by="user"))])
+        app.include_router(router, dependencies=[Depends(rate_limit("login", "10/60"))])
+    """
+    limiter = RateLimiter(name, spec)
+
+    if by == "user":
+        async def dependency(current_user: User = Depends(current_user)):
+            await limiter.check(f"user:{current_user.id}")
+    else:
+        async def dependency(request: Request):
+            await limiter.check(f"ip:{request.client.host if request.client else 'unknown'}")
+
+    dependency.limiter = limiter
+    return dependency
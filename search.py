@@ -0,0 +1,29 @@
+from sqlalchemy import case, func
+
+
+def contains_pattern(query: str) -> str:
+    """LIKE-шаблон "%query%", в котором экранированы %, _ и обратный слэш."""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def text_match(column, query: str, dialect: str):
+    """
+    Условие поиска подстроки/опечатки.
+    На Postgres ILIKE и оператор % (pg_trgm) обслуживаются GIN-индексом gin_trgm_ops.
+    """
+    condition = column.ilike(contains_pattern(query), escape="\\")
+    if dialect == "postgresql":
+        condition = condition | column.op("%")(query)
+    return condition
+
+
+def text_rank(column, query: str, dialect: str):
+    """
+    Выражения сортировки по релевантности: сначала совпадение с начала строки,
+    затем триграммная похожесть (только Postgres).
+    """
+    prefix_first = case((column.ilike(contains_pattern(query)[1:], escape="\\"), 0), else_=1)
+    if dialect == "postgresql":
+        return prefix_first, func.similarity(column, query).desc()
+    return (prefix_first,)
@@ -3,8 +3,8 @@ from pathlib import Path
 from typing import AsyncGenerator
 
 import redis
-from pydantic import Field
-from pydantic.v1 import BaseSettings
+import redis.asyncio as aioredis
+from pydantic.v1 import BaseSettings, Field
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
@@ -21,6 +21,51 @@ class Settings(BaseSettings):
     redis_url: str = Field("redis://localhost:6379/1", env="REDIS_URL")
     secret: str = Field("SECRET", env="SECRET")
 
+    # Отложенная (write-behind) агрегация счётчиков реакций через Redis
+    reaction_counters_write_behind: bool = Field(False, env="REACTION_COUNTERS_WRITE_BEHIND")
+    reaction_counters_flush_seconds: int = Field(10, env="REACTION_COUNTERS_FLUSH_SECONDS")
+
+    # Поток событий реакций (Redis Stream) для аналитики и уведомлений
+    reaction_events_enabled: bool = Field(False, env="REACTION_EVENTS_ENABLED")
+    reaction_events_maxlen: int = Field(1_000_000, env="REACTION_EVENTS_MAXLEN")
+    reaction_events_max_age_seconds: int = Field(7 * 24 * 3600, env="REACTION_EVENTS_MAX_AGE_SECONDS")
+
+    # Кэш ролей участников сообществ: TTL в Redis и в памяти процесса (секунды)
+    community_role_cache_ttl: int = Field(60, env="COMMUNITY_ROLE_CACHE_TTL")
+    community_role_cache_local_ttl: float = Field(5.0, env="COMMUNITY_ROLE_CACHE_LOCAL_TTL")
+
+    # Кэш аутентифицированного пользователя (JWT): TTL в Redis и в памяти процесса (секунды)
+    principal_cache_ttl: int = Field(300, env="PRINCIPAL_CACHE_TTL")
+    principal_cache_local_ttl: float = Field(5.0, env="PRINCIPAL_CACHE_LOCAL_TTL")
+
+    # Кэш агрегированного профиля пользователя: TTL в Redis и в памяти процесса (секунды)
+    profile_cache_ttl: int = Field(30, env="PROFILE_CACHE_TTL")
+    profile_cache_local_ttl: float = Field(2.0, env="PROFILE_CACHE_LOCAL_TTL")
+    profile_gallery_limit: int = Field(6, env="PROFILE_GALLERY_LIMIT")
+
+    # Пул потоков для хэширования паролей: размер и предельная длина очереди (0 — без предела)
+    password_hash_workers: int = Field(4, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_queue: int = Field(64, env="PASSWORD_HASH_MAX_QUEUE")
+
+    # JWT: срок жизни и stateless-режим (пользователь из claims + Bloom-фильтр отзывов вместо кэша/БД)
+    jwt_lifetime_seconds: int = Field(3600, env="JWT_LIFETIME_SECONDS")
+    jwt_stateless: bool = Field(False, env="JWT_STATELESS")
+    jwt_revocation_bloom_bits: int = Field(1 << 20, env="JWT_REVOCATION_BLOOM_BITS")
+    jwt_revocation_refresh_seconds: float = Field(1.0, env="JWT_REVOCATION_REFRESH_SECONDS")
+
+    # Зеркала подписок в Redis-множествах: TTL и предельный размер для прогрева
+    follow_set_ttl: int = Field(24 * 3600, env="FOLLOW_SET_TTL")
+    follow_set_max_warm: int = Field(100_000, env="FOLLOW_SET_MAX_WARM")
+
+    # Загрузки: предельный размер одного файла и размер куска копирования (байты)
+    upload_max_bytes: int = Field(20 * 1024 * 1024, env="UPLOAD_MAX_BYTES")
+    upload_chunk_bytes: int = Field(1024 * 1024, env="UPLOAD_CHUNK_BYTES")
+
+    # Лимиты запросов (token bucket в Redis): "<запросов>/<секунд>"
+    rate_limit_enabled: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    rate_limit_login: str = Field("10/60", env="RATE_LIMIT_LOGIN")
+    rate_limit_reactions: str = Field("60/10", env="RATE_LIMIT_REACTIONS")
+
     @property
     def db_async_url(self) -> str:
         return (
@@ -50,6 +95,9 @@ class Settings(BaseSettings):
     media_post_images_dir: Path = media_dir / "post_images"
     media_temp_post_images_dir: Path = media_dir / "post_images_tmp"
 
+    # Изображения галереи, постов и комментариев по SHA-256 исходника (см. media_storage.blobs)
+    media_blobs_dir: Path = media_dir / "blobs"
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -96,6 +144,17 @@ def get_redis():
     return redis.from_url(get_settings().redis_url, decode_responses=True)
 
 
+@lru_cache
+def get_async_redis():
+    return aioredis.from_url(get_settings().redis_url, decode_responses=True)
+
+
+@lru_cache
+def get_async_redis_binary():
+    """Клиент без декодирования ответов — для битовых строк (GET битмапа)."""
+    return aioredis.from_url(get_settings().redis_url)
+
+
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
 
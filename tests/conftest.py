@@ -8,12 +8,14 @@ os.environ.setdefault("DB_PASSWORD", "dummy")
 os.environ.setdefault("REDIS_URL", "redis://localhost:6379/1")
 os.environ.setdefault("SECRET", "test_secret")
 
+import pytest
 import pytest_asyncio
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from httpx import AsyncClient, ASGITransport
 
 from auth.models import User
+from cache import clear_local_caches
 from categories.models import Category
 from comments.models import Comment
 from communities.models import Community
@@ -42,6 +44,13 @@ async def prepare_database():
     yield
 
 
+@pytest.fixture(autouse=True)
+def reset_local_caches():
+    """SQLite переиспользует id после удалений — закэшированное в процессе не должно переживать тест."""
+    clear_local_caches()
+    yield
+
+
 @pytest_asyncio.fixture
 async def db_session():
     async with AsyncSessionLocal() as session:
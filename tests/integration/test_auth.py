@@ -1,6 +1,31 @@
+import asyncio
+import json
+import threading
+import time
+
+import jwt
 import pytest
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.models import User
+from auth.bulk_import import UserBulkImporter, read_records
+from auth.manager import UserManager
+from auth.models import User, UserFollowSuggestion, UserGallery, user_subscriptions
+from auth.password import password_hashing_pool
+from auth.principal_cache import principal_cache, user_snapshot
+from auth.revocation import RevocationFilter, revocation_filter
+from auth.strategy import CachedJWTStrategy
+from auth.utils import CustomUserDatabase
+from celery_main import celery_app
+from celery_tasks.build_follow_suggestions import FollowGraph
+from comments.models import Comment, CommentImages
+from main import login_rate_limit
+from media_storage.blobs import release_blob
+from media_storage.models import MediaBlob
+from posts.models import Post, PostImages
+from settings import Base, get_settings
 
 
 @pytest.mark.asyncio
@@ -118,3 +143,361 @@ async def test_toggle_follow_user(authenticated_client, db_session, second_user)
     assert response.json()["detail"] == "Пользователь не найден"
 
 
+
+
+@pytest.mark.asyncio
+async def test_search_users(async_client, first_user, second_user):
+    response = await async_client.get("/users/search/", params={"q": "second_test"})
+    assert response.status_code == 200
+    assert [user["username"] for user in response.json()] == [second_user.username]
+
+
+@pytest.mark.asyncio
+async def test_token_version_revokes_cached_principal(authenticated_client, db_session, first_user):
+    response = await authenticated_client.get("/likes/me/posts")
+    assert response.status_code == 200
+
+    first_user.token_version += 1
+    await db_session.commit()
+    await principal_cache.invalidate(first_user.id)
+
+    response = await authenticated_client.get("/likes/me/posts")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_attached_principal_requires_explicit_refresh(db_session, first_user):
+    # Отдельная сессия, как у запроса
+    async with AsyncSession(db_session.bind) as session:
+        user = await principal_cache.attach(session, user_snapshot(first_user))
+        assert user.username == first_user.username
+
+        # Незагруженные колонки не читаются молча: нужен явный refresh
+        with pytest.raises(MissingGreenlet):
+            user.followers_count
+        await session.refresh(user, ["followers_count", "hashed_password"])
+        assert user.followers_count == 0
+        assert user.hashed_password == first_user.hashed_password
+
+
+@pytest.mark.asyncio
+async def test_login_rejected_by_local_rate_limit_prefilter(async_client, first_user):
+    login_rate_limit.limiter.blocked.set("ip:127.0.0.1", time.monotonic() + 30)
+
+    response = await async_client.post(
+        "/auth/jwt/login",
+        data={"username": first_user.username, "password": "hard_password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_logout_not_limited_by_login_rate_limit(authenticated_client):
+    login_rate_limit.limiter.blocked.set("ip:127.0.0.1", time.monotonic() + 30)
+
+    response = await authenticated_client.post("/auth/jwt/logout")
+    assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_login_rejected_when_password_queue_is_full(async_client, first_user, monkeypatch):
+    monkeypatch.setattr(password_hashing_pool, "max_queue", 1)
+    release = threading.Event()
+    # Занимаем все потоки пула и одно место в очереди
+    blockers = [
+        asyncio.create_task(password_hashing_pool.run(release.wait))
+        for _ in range(password_hashing_pool.workers + 1)
+    ]
+    await asyncio.sleep(0)
+    rejected = password_hashing_pool.stats()["rejected"]
+
+    try:
+        response = await async_client.post(
+            "/auth/jwt/login",
+            data={"username": first_user.username, "password": "hard_password"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+    finally:
+        release.set()
+        await asyncio.gather(*blockers)
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert password_hashing_pool.stats()["rejected"] == rejected + 1
+    assert password_hashing_pool.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stateless_jwt(async_client, db_session, first_user, monkeypatch):
+    monkeypatch.setattr(get_settings(), "jwt_stateless", True)
+    # Redis в тестах нет: помечаем локальную копию фильтра загруженной (пустой)
+    monkeypatch.setattr(revocation_filter, "_bitmaps", {})
+    monkeypatch.setattr(revocation_filter, "_version", 0)
+    monkeypatch.setattr(revocation_filter, "_checked_at", time.monotonic())
+    monkeypatch.setattr(revocation_filter, "refresh_seconds", 3600)
+
+    full_checks = []
+    cached_read_token = CachedJWTStrategy.read_token
+
+    async def spy_read_token(self, token, user_manager):
+        full_checks.append(token)
+        return await cached_read_token(self, token, user_manager)
+
+    monkeypatch.setattr(CachedJWTStrategy, "read_token", spy_read_token)
+
+    async def no_cache_lookup(user_id):
+        raise AssertionError("stateless path must not read the principal cache")
+
+    login_resp = await async_client.post(
+        "/auth/jwt/login",
+        data={"username": first_user.username, "password": "hard_password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    assert login_resp.status_code == 200
+    token = login_resp.json()["access_token"]
+    claims = jwt.decode(token, options={"verify_signature": False})
+    assert claims["sub"] == str(first_user.id)
+    assert claims["act"] is True
+    assert claims["ver"] == first_user.token_version
+
+    with monkeypatch.context() as patch:
+        patch.setattr(principal_cache, "get", no_cache_lookup)
+        response = await async_client.get("/likes/me/posts", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert full_checks == []
+
+    # Отзыв, как в UserManager._update: версия в БД растёт, старая пара попадает в фильтр
+    await revocation_filter.add(first_user.id, first_user.token_version)
+    first_user.token_version += 1
+    await db_session.commit()
+
+    response = await async_client.get("/likes/me/posts", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert full_checks == [token]
+
+
+@pytest.mark.asyncio
+async def test_revocation_filter_local_copy():
+    revocation = RevocationFilter(bits=1 << 12, lifetime_seconds=3600, refresh_seconds=3600)
+    # Пустой фильтр уже "загружен": Redis в тестах нет, проверяется только локальная копия
+    revocation._version = 0
+    revocation._checked_at = time.monotonic()
+
+    assert not await revocation.might_be_revoked(1, 0)
+
+    await revocation.add(1, 0)
+
+    assert await revocation.might_be_revoked(1, 0)
+    assert not await revocation.might_be_revoked(1, 1)
+
+
+@pytest.mark.asyncio
+async def test_follow_counts_and_lists(authenticated_client, db_session, first_user, second_user):
+    response = await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+    assert response.status_code == 200
+
+    await db_session.refresh(first_user)
+    await db_session.refresh(second_user)
+    assert first_user.following_count == 1
+    assert second_user.followers_count == 1
+
+    response = await authenticated_client.get(f"/users/{second_user.id}/followers/")
+    assert response.status_code == 200
+    data = response.json()
+    assert [user["id"] for user in data["items"]] == [first_user.id]
+    assert data["next_cursor"] is None
+
+    response = await authenticated_client.get(f"/users/{first_user.id}/following/")
+    assert [user["id"] for user in response.json()["items"]] == [second_user.id]
+
+    response = await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+    assert "Вы успешно отписались" in response.json()["message"]
+
+    await db_session.refresh(second_user)
+    assert second_user.followers_count == 0
+
+
+def test_follow_graph_suggestions():
+    graph = FollowGraph()
+    # 1 -> 2, 3; 2 -> 4, 5; 3 -> 1, 4
+    for follower_id, following in ((1, [2, 3]), (2, [4, 5]), (3, [1, 4])):
+        graph.followers.append(follower_id)
+        graph.following.extend(following)
+        graph.offsets.append(len(graph.following))
+
+    assert graph.suggestions(1, top_n=10, max_degree=100) == [(4, 2), (5, 1)]
+    assert graph.suggestions(1, top_n=10, max_degree=1) == []
+
+
+@pytest.mark.asyncio
+async def test_get_follow_suggestions(authenticated_client, db_session, first_user, second_user):
+    suggestion = UserFollowSuggestion(user_id=first_user.id, suggested_user_id=second_user.id, score=3)
+    db_session.add(suggestion)
+    await db_session.commit()
+
+    response = await authenticated_client.get("/users/me/suggestions/")
+    assert response.status_code == 200
+    assert [(item["user"]["id"], item["score"]) for item in response.json()] == [(second_user.id, 3)]
+
+    await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+
+    response = await authenticated_client.get("/users/me/suggestions/")
+    assert response.json() == []
+
+    await db_session.delete(suggestion)
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_followed_by_my_following(authenticated_client, db_session, first_user, second_user):
+    # Redis в тестах недоступен — пересечение считается SQL-фолбэком.
+    # Третьего пользователя в фикстурах нет, поэтому second_user подписан сам на себя
+    await db_session.execute(
+        insert(user_subscriptions).values(follower_id=second_user.id, following_id=second_user.id)
+    )
+    await db_session.commit()
+    await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+
+    response = await authenticated_client.get(f"/users/{second_user.id}/followed-by/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 1
+    assert [user["id"] for user in data["users"]] == [second_user.id]
+
+    response = await authenticated_client.get(f"/users/{second_user.id}/mutual-followers/")
+    assert response.json() == {"count": 0, "users": []}
+
+    await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+    await db_session.execute(
+        delete(user_subscriptions).where(user_subscriptions.c.follower_id == second_user.id)
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_user_profile(authenticated_client, db_session, first_user, second_user):
+    photo = UserGallery(user_id=second_user.id, url="/media/photo.jpg", thumbnail_url="/media/thumb.jpg")
+    db_session.add(photo)
+    await db_session.commit()
+
+    response = await authenticated_client.get(f"/users/{second_user.id}/profile/")
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["username"] == second_user.username
+    assert profile["followers_count"] == 0
+    assert profile["gallery"] == [{"id": photo.id, "url": photo.url, "thumbnail_url": photo.thumbnail_url}]
+
+    # Подписка сбрасывает закэшированный профиль
+    await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+    response = await authenticated_client.get(f"/users/{second_user.id}/profile/")
+    assert response.json()["followers_count"] == 1
+
+    response = await authenticated_client.get("/users/999999/profile/")
+    assert response.status_code == 404
+
+    await authenticated_client.post(f"/subscriptions/follow/{second_user.id}")
+    await db_session.delete(photo)
+    await db_session.commit()
+
+
+def test_bulk_import_users(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(engine)
+    helper = PasswordHelper()
+    with engine.begin() as connection:
+        connection.execute(insert(User).values(
+            email="taken@mail.ru", username="taken", phone_number="80000000000", hashed_password="$x"
+        ))
+
+    def user(number: int, **fields) -> dict:
+        return {
+            "email": f"partner_{number}@mail.ru",
+            "username": f"partner_{number}",
+            "phone_number": f"8100000000{number}",
+            "first_name": "Partner",
+            "last_name": "User",
+            "password": "hard_password",
+            **fields
+        }
+
+    lines = [
+        user(1),
+        user(3, email="PARTNER_1@mail.ru"),
+        user(2, password=None, hashed_password=helper.hash("pre_hashed")),
+        user(4, phone_number=None),
+        user(5, username="taken"),
+    ]
+    path = tmp_path / "users.jsonl"
+    path.write_text("\n".join([*map(json.dumps, lines), "{broken"]), encoding="utf-8")
+
+    rejects = {}
+    importer = UserBulkImporter(
+        engine, chunk_size=2, workers=0, on_reject=lambda line, reason, record: rejects.update({line: reason})
+    )
+    stats = importer.run(read_records(str(path)))
+
+    assert stats == {"read": 6, "imported": 2, "rejected": 4}
+    assert sorted(rejects) == [2, 4, 5, 6]
+    assert "повторяется в файле" in rejects[2]
+    assert "phone_number" in rejects[4]
+    assert "уже зарегистрирован" in rejects[5]
+
+    with engine.connect() as connection:
+        hashes = dict(connection.execute(
+            select(User.username, User.hashed_password).where(User.username.like("partner_%"))
+        ).all())
+    assert helper.verify_and_update("hard_password", hashes["partner_1"])[0]
+    assert helper.verify_and_update("pre_hashed", hashes["partner_2"])[0]
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_delete_user_releases_media_blobs(db_session, first_user, monkeypatch):
+    user = User(
+        email="leaving@mail.ru", username="leaving_user", phone_number="89990000001",
+        first_name="John", last_name="Doe", hashed_password="$argon2id$stub"
+    )
+    db_session.add(user)
+    await db_session.flush()
+    post = Post(title="Leaving", content="Leaving", user_id=user.id)
+    db_session.add(post)
+    await db_session.flush()
+    # Чужой комментарий к посту удаляется каскадом вместе с постом
+    comment = Comment(text="Bye", user_id=first_user.id, post_id=post.id)
+    db_session.add(comment)
+    await db_session.flush()
+
+    blobs = {kind: kind * 32 for kind in ("ab", "cd", "ef")}
+    for sha256 in blobs.values():
+        # Вторая ссылка — у кого-то ещё, файл должен остаться
+        db_session.add(MediaBlob(sha256=sha256, url=f"/media/{sha256}.jpg", thumbnail_url="/t.jpg", ref_count=2))
+    db_session.add_all([
+        UserGallery(url="/media/ab.jpg", blob_sha256=blobs["ab"], user_id=user.id),
+        PostImages(url="/media/cd.jpg", blob_sha256=blobs["cd"], post_id=post.id),
+        CommentImages(url="/media/ef.jpg", blob_sha256=blobs["ef"], comment_id=comment.id)
+    ])
+    await db_session.commit()
+
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args: sent.append((name, args)))
+
+    await UserManager(CustomUserDatabase(db_session, User)).delete(user)
+
+    assert sorted(sent) == [
+        ("celery_tasks.delete_comment_image", ["/media/ef.jpg", blobs["ef"]]),
+        ("celery_tasks.delete_media", ["/media/ab.jpg", blobs["ab"]]),
+        ("celery_tasks.delete_post_image", ["/media/cd.jpg", blobs["cd"]])
+    ]
+
+    # Задачи удаления отпускают ссылку так же, как release_media
+    for _, (_, sha256) in sent:
+        await db_session.run_sync(lambda session: release_blob(session, sha256))
+    await db_session.commit()
+    for sha256 in blobs.values():
+        blob = await db_session.get(MediaBlob, sha256)
+        await db_session.refresh(blob)
+        assert blob.ref_count == 1
+        await db_session.delete(blob)
+    await db_session.commit()
@@ -1,9 +1,17 @@
+import base64
+import json
+
 import pytest
 
-from communities.models import Community
+from celery_main import celery_app
+from communities.models import Community, CommunityMembership, CommunityRoleEnum
 from posts.models import Post
 
 
+def encode_cursor_json(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
 @pytest.mark.asyncio
 async def test_create_community(authenticated_client, db_session):
     payload = {
@@ -29,7 +37,28 @@ async def test_get_all_communities(authenticated_client, db_session, first_commu
     assert response.status_code == 200
 
     data = response.json()
-    assert len(data) == 3
+    assert len(data["items"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_community_directory_pagination(authenticated_client, db_session, first_community, second_community):
+    response = await authenticated_client.get("/communities/all/", params={"sort": "name", "limit": 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 1
+    assert first_page["items"][0]["member_count"] == 1
+    assert first_page["next_cursor"] is not None
+
+    response = await authenticated_client.get(
+        "/communities/all/",
+        params={"sort": "name", "limit": 1, "after": first_page["next_cursor"]}
+    )
+    second_page = response.json()
+    assert second_page["items"][0]["name"] > first_page["items"][0]["name"]
+
+    for cursor in ("broken", encode_cursor_json(5), encode_cursor_json([1]), encode_cursor_json(["x", 1])):
+        response = await authenticated_client.get("/communities/all/", params={"after": cursor})
+        assert response.status_code == 400
 
 
 @pytest.mark.asyncio
@@ -157,3 +186,199 @@ async def test_update_community_post(
     assert post.title == "Updated second test post in community"
     assert post.content == "Second test post in community content"
 
+
+
+@pytest.mark.asyncio
+async def test_cached_role_invalidated_on_unsubscribe(
+        authenticated_client,
+        db_session,
+        first_user,
+        first_community,
+        seed_categories):
+    payload = {
+        "title": "Role cache post",
+        "content": "Role cache content",
+        "categories": ["Books"],
+        "user_id": first_user.id
+    }
+
+    response = await authenticated_client.post(f"/communities/{first_community.id}/posts/", json=payload)
+    assert response.status_code == 201
+
+    response = await authenticated_client.post(f"/communities/{first_community.id}/subscribe/")
+    assert response.json()["status"] == "unsubscribed"
+
+    response = await authenticated_client.post(f"/communities/{first_community.id}/posts/", json=payload)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Вы не состоите в этом сообществе"
+
+    response = await authenticated_client.post("/communities/0/posts/", json=payload)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_demoted_moderator_loses_access(
+        authenticated_client,
+        db_session,
+        first_user,
+        second_user,
+        first_community,
+        seed_categories):
+    admin_headers = {"Authorization": authenticated_client.headers["Authorization"]}
+    login = await authenticated_client.post(
+        "/auth/jwt/login",
+        data={"username": second_user.username, "password": "hard_password"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    moderator_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    bulk_url = f"/communities/{first_community.id}/members/bulk/"
+    payload = {
+        "title": "Moderator post",
+        "content": "Moderator content",
+        "categories": ["Books"],
+        "user_id": second_user.id
+    }
+
+    await authenticated_client.post(
+        bulk_url, json={"members": [{"user_id": second_user.id, "role": "moderator"}]}, headers=admin_headers
+    )
+    response = await authenticated_client.post(
+        f"/communities/{first_community.id}/posts/", json=payload, headers=moderator_headers
+    )
+    assert response.status_code == 201
+
+    # Роль модератора закэширована — понижение должно её сбросить
+    await authenticated_client.post(
+        bulk_url, json={"members": [{"user_id": second_user.id, "role": "user"}]}, headers=admin_headers
+    )
+    response = await authenticated_client.post(
+        f"/communities/{first_community.id}/posts/", json=payload, headers=moderator_headers
+    )
+    assert response.status_code == 403
+
+    await db_session.delete(await db_session.get(CommunityMembership, (second_user.id, first_community.id)))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_communities_feed(
+        authenticated_client,
+        db_session,
+        first_community,
+        first_post_in_community,
+        second_post_in_community):
+    response = await authenticated_client.get("/communities/feed/", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert [post["id"] for post in data["items"]] == [second_post_in_community.id]
+    assert data["next_cursor"]
+
+    response = await authenticated_client.get(
+        "/communities/feed/", params={"limit": 1, "after": data["next_cursor"]}
+    )
+    data = response.json()
+    assert [post["id"] for post in data["items"]] == [first_post_in_community.id]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_members(authenticated_client, db_session, first_user, second_user, first_community):
+    payload = {
+        "members": [
+            {"user_id": second_user.id, "role": "moderator"},
+            {"user_id": first_user.id, "role": "user"},
+            {"user_id": 999999}
+        ]
+    }
+    response = await authenticated_client.post(f"/communities/{first_community.id}/members/bulk/", json=payload)
+    assert response.status_code == 200
+    # first_user — администратор: его роль не меняется и в updated не считается
+    assert response.json() == {
+        "community_id": first_community.id,
+        "added": 1,
+        "updated": 0,
+        "skipped_user_ids": [999999]
+    }
+
+    members = {"members": [{"user_id": second_user.id, "role": "user"}]}
+    response = await authenticated_client.post(f"/communities/{first_community.id}/members/bulk/", json=members)
+    assert (response.json()["added"], response.json()["updated"]) == (0, 1)
+
+    response = await authenticated_client.post(f"/communities/{first_community.id}/members/bulk/", json=members)
+    assert (response.json()["added"], response.json()["updated"]) == (0, 0)
+
+    response = await authenticated_client.get(f"/communities/{first_community.id}/")
+    assert response.json()["member_count"] == 2
+
+    membership = await db_session.get(CommunityMembership, (first_user.id, first_community.id))
+    await db_session.refresh(membership)
+    assert membership.role == CommunityRoleEnum.admin
+
+
+@pytest.mark.asyncio
+async def test_search_communities(authenticated_client, db_session, first_community, second_community):
+    response = await authenticated_client.get("/communities/search/", params={"q": "SECOND comm"})
+    assert response.status_code == 200
+    assert [community["id"] for community in response.json()] == [second_community.id]
+
+    response = await authenticated_client.get("/communities/search/", params={"q": "test"})
+    assert {first_community.id, second_community.id} <= {community["id"] for community in response.json()}
+
+    response = await authenticated_client.get("/communities/search/", params={"q": "%_"})
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_delete_community_hides_it_and_enqueues_task(
+        authenticated_client,
+        db_session,
+        first_community,
+        monkeypatch):
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda name, args, task_id: sent.append((name, args, task_id)))
+
+    response = await authenticated_client.delete(f"/communities/delete/{first_community.id}/")
+    assert response.status_code == 202
+    assert response.json()["task_id"] == f"delete-community-{first_community.id}"
+    assert sent == [("celery_tasks.delete_community", [first_community.id], f"delete-community-{first_community.id}")]
+
+    response = await authenticated_client.get(f"/communities/{first_community.id}/")
+    assert response.status_code == 404
+
+    response = await authenticated_client.get(f"/communities/{first_community.id}/posts/")
+    assert response.status_code == 404
+
+    response = await authenticated_client.post(f"/communities/{first_community.id}/subscribe/")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_community_members(authenticated_client, db_session, first_user, second_user, first_community):
+    payload = {"members": [{"user_id": second_user.id, "role": "moderator"}]}
+    response = await authenticated_client.post(f"/communities/{first_community.id}/members/bulk/", json=payload)
+    assert response.status_code == 200
+
+    response = await authenticated_client.get(f"/communities/{first_community.id}/members/", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == [{
+        "role": "admin",
+        "user": {
+            "id": first_user.id,
+            "username": first_user.username,
+            "first_name": first_user.first_name,
+            "last_name": first_user.last_name,
+            "avatar_url": None
+        }
+    }]
+
+    response = await authenticated_client.get(
+        f"/communities/{first_community.id}/members/", params={"limit": 1, "after": data["next_cursor"]}
+    )
+    data = response.json()
+    assert [member["user"]["id"] for member in data["items"]] == [second_user.id]
+    assert data["next_cursor"] is None
+
+    response = await authenticated_client.get(
+        f"/communities/{first_community.id}/members/", params={"role": "moderator"}
+    )
+    assert [member["role"] for member in response.json()["items"]] == ["moderator"]
@@ -1,6 +1,80 @@
+import time
+
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from like_dislike import counter_buffer, events
+from like_dislike.counter_buffer import FLUSHING_KEY, GENERATION_KEY, PENDING_KEY, ReactionCounterBuffer
+from like_dislike.events import STREAM_KEY, ReactionEventConsumer, trim_reaction_events
 from like_dislike.models import Like, Dislike
+from posts.models import Post
+from settings import get_settings
+
+
+class FakeAsyncRedis:
+    """Минимальный асинхронный Redis на словарях: hmget/get через pipeline."""
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def pipeline(self, transaction: bool = True):
+        return FakeAsyncPipeline(self)
+
+
+class FakeAsyncPipeline:
+    def __init__(self, redis: FakeAsyncRedis):
+        self.redis = redis
+        self.results = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def hmget(self, key, fields):
+        self.results.append([self.redis.data.get(key, {}).get(field) for field in fields])
+
+    def get(self, key):
+        self.results.append(self.redis.data.get(key))
+
+    def xadd(self, key, fields, **kwargs):
+        self.results.append(fields)
+
+    async def execute(self):
+        self.redis.data.setdefault(STREAM_KEY, []).extend(
+            result for result in self.results if isinstance(result, dict)
+        )
+        return self.results
+
+
+class FakeStreamRedis:
+    """Синхронный Redis для потребителя: зависшие события, новые события и XACK."""
+
+    def __init__(self, pending: list, new: list):
+        self.pending = pending
+        self.new = new
+        self.groups = []
+        self.acked = []
+        self.trims = []
+
+    def xgroup_create(self, key, group, id, mkstream):
+        self.groups.append((key, group))
+
+    def xautoclaim(self, key, group, consumer, min_idle_ms, start_id, count):
+        claimed, self.pending = self.pending[:count], self.pending[count:]
+        return ["0-0", claimed, []]
+
+    def xreadgroup(self, group, consumer, streams, count, block):
+        read, self.new = self.new[:count], self.new[count:]
+        return [[STREAM_KEY, read]] if read else []
+
+    def xack(self, key, group, *ids):
+        self.acked.extend(ids)
+
+    def xtrim(self, key, **kwargs):
+        self.trims.append(kwargs)
+        return 1
 
 
 @pytest.mark.asyncio
@@ -55,6 +129,10 @@ async def test_toggle_like_comment(authenticated_client, db_session, first_comme
     assert like_in_db.content_id == comment_id
     assert like_in_db.content_type == "comment"
 
+    response = await authenticated_client.get(f"/comments/{comment_id}/")
+    assert response.json()["likes_count"] == 1
+    assert response.json()["reactions"]["like"] == 1
+
     response = await authenticated_client.post(f"/likes/comment/{comment_id}/like")
     assert response.status_code == 200
     data = response.json()
@@ -63,6 +141,9 @@ async def test_toggle_like_comment(authenticated_client, db_session, first_comme
     like_in_db = await db_session.get(Like, like_id)
     assert like_in_db is None
 
+    response = await authenticated_client.get(f"/comments/{comment_id}/")
+    assert response.json()["likes_count"] == 0
+
 
 @pytest.mark.asyncio
 async def test_toggle_dislike_post(authenticated_client, db_session, first_post):
@@ -148,4 +229,146 @@ async def test_switch_dislike_to_like(authenticated_client, db_session, first_po
     assert dislike_in_db is None
 
     like_in_db = await db_session.get(Like, like_id)
-    assert like_in_db is not None
\ No newline at end of file
+    assert like_in_db is not None
+
+@pytest.mark.asyncio
+async def test_get_my_reactions(authenticated_client, db_session, first_post, second_post, first_comment):
+    response = await authenticated_client.post(f"/likes/post/{first_post.id}/like")
+    assert response.status_code == 200
+    response = await authenticated_client.post(f"/dislikes/comment/{first_comment.id}/dislike")
+    assert response.status_code == 200
+
+    response = await authenticated_client.get(
+        "/reactions/me",
+        params={"posts": [first_post.id, second_post.id], "comments": [first_comment.id]}
+    )
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["posts"] == {str(first_post.id): "like", str(second_post.id): None}
+    assert data["comments"] == {str(first_comment.id): "dislike"}
+
+
+@pytest.mark.asyncio
+async def test_post_likers_and_my_liked_posts(authenticated_client, db_session, first_post, second_post):
+    for post in (first_post, second_post):
+        response = await authenticated_client.post(f"/likes/post/{post.id}/like")
+        assert response.status_code == 200
+
+    response = await authenticated_client.get(f"/likes/post/{first_post.id}/users")
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["user"]["id"] for item in data["items"]] == [authenticated_client.current_user.id]
+    assert data["next_cursor"] is None
+
+    response = await authenticated_client.get("/likes/me/posts", params={"limit": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["post"]["id"] for item in data["items"]] == [second_post.id]
+    assert data["next_cursor"] is not None
+
+    response = await authenticated_client.get(
+        "/likes/me/posts",
+        params={"limit": 1, "after": data["next_cursor"]}
+    )
+    data = response.json()
+    assert first_post.id in [item["post"]["id"] for item in data["items"]]
+
+
+@pytest.mark.asyncio
+async def test_toggle_emoji_reaction_replaces_like(authenticated_client, db_session, second_post):
+    response = await authenticated_client.post(f"/likes/post/{second_post.id}/like")
+    assert response.status_code == 200
+    like_id = response.json()["id"]
+
+    response = await authenticated_client.post(f"/reactions/post/{second_post.id}/love")
+    assert response.status_code == 200
+    assert response.json()["kind"] == "love"
+
+    assert await db_session.get(Like, like_id) is None
+
+    response = await authenticated_client.get(f"/posts/{second_post.id}/")
+    assert response.json()["reactions"]["love"] == 1
+
+    response = await authenticated_client.post(f"/reactions/post/{second_post.id}/love")
+    assert response.status_code == 200
+    assert response.json()["message"] == "Реакция ❤️ убрана"
+
+    response = await authenticated_client.get(f"/posts/{second_post.id}/")
+    assert response.json()["reactions"]["love"] == 0
+
+    response = await authenticated_client.post(f"/reactions/post/{second_post.id}/unknown")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_apply_pending_skips_already_flushed_deltas(monkeypatch):
+    monkeypatch.setattr(get_settings(), "reaction_counters_write_behind", True)
+    monkeypatch.setattr(counter_buffer, "get_async_redis", lambda: FakeAsyncRedis({
+        PENDING_KEY: {"1:like": "2"},
+        FLUSHING_KEY: {"1:like": "5", "2:like": "3"},
+        GENERATION_KEY: "4"
+    }))
+    # Пост 1 уже получил флаш поколения 4 (UPDATE закоммичен, flushing-хэш ещё жив), пост 2 — нет
+    flushed = Post(id=1, likes_count=10, dislikes_count=0, reaction_counters_generation=4)
+    not_flushed = Post(id=2, likes_count=10, dislikes_count=0, reaction_counters_generation=3)
+
+    await ReactionCounterBuffer().apply_pending([flushed, not_flushed])
+
+    assert flushed.likes_count == 12
+    assert not_flushed.likes_count == 13
+
+
+@pytest.mark.asyncio
+async def test_reaction_events_published_only_after_commit(authenticated_client, first_user, first_post, monkeypatch):
+    monkeypatch.setattr(get_settings(), "reaction_events_enabled", True)
+    redis = FakeAsyncRedis({})
+    monkeypatch.setattr(events, "get_async_redis", lambda: redis)
+
+    async def failing_commit(self):
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(AsyncSession, "commit", failing_commit)
+        with pytest.raises(RuntimeError):
+            await authenticated_client.post(f"/likes/post/{first_post.id}/like")
+    assert STREAM_KEY not in redis.data
+
+    response = await authenticated_client.post(f"/likes/post/{first_post.id}/like")
+    assert response.status_code == 200
+    assert redis.data[STREAM_KEY] == [{
+        "user": first_user.id, "type": "post", "content": first_post.id, "kind": "like", "op": "+"
+    }]
+
+
+def test_reaction_event_consumer_claims_handles_and_acks(monkeypatch):
+    redis = FakeStreamRedis(
+        pending=[("1-0", {"kind": "like", "op": "+"})],
+        new=[("2-0", {"kind": "like", "op": "-"}), ("3-0", {"kind": "dislike", "op": "+"})]
+    )
+    monkeypatch.setattr(events, "get_redis", lambda: redis)
+    consumer = ReactionEventConsumer("notifications", "worker-1")
+    handled = []
+
+    assert consumer.process_batch(handled.extend, count=2) == {"processed": 2}
+    # Сначала забираются зависшие события, новые дочитываются до размера пачки
+    assert [event_id for event_id, _ in handled] == ["1-0", "2-0"]
+    assert redis.acked == ["1-0", "2-0"]
+    assert redis.groups == [(STREAM_KEY, "notifications")]
+
+    def failing_handler(batch):
+        raise RuntimeError("handler failed")
+
+    with pytest.raises(RuntimeError):
+        consumer.process_batch(failing_handler)
+    assert redis.acked == ["1-0", "2-0"]
+
+
+def test_trim_reaction_events(monkeypatch):
+    redis = FakeStreamRedis(pending=[], new=[])
+    monkeypatch.setattr(events, "get_redis", lambda: redis)
+
+    assert trim_reaction_events(maxlen=100, max_age_seconds=3600) == 2
+    assert redis.trims[0] == {"maxlen": 100, "approximate": True}
+    min_ms = int(redis.trims[1]["minid"].split("-")[0])
+    assert abs(min_ms - (time.time() - 3600) * 1000) < 5000
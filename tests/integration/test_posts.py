@@ -1,7 +1,19 @@
+import hashlib
+import io
+import os
+
 import pytest
 import pytest_asyncio
+from PIL import Image
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
 
+from media_storage.blobs import acquire_blob, blob_paths, file_sha256, release_blob, remove_blob_files
+from media_storage.models import MediaBlob
 from posts.models import Post
+from settings import Base, get_settings
+from uploads import save_upload, save_uploads
 
 
 @pytest.mark.asyncio
@@ -49,3 +61,68 @@ async def test_update_post(authorized_client_with_post):
     assert response.status_code == 200
 
 
+
+
+@pytest.mark.asyncio
+async def test_save_upload_streams_in_chunks(tmp_path):
+    data = os.urandom(10_000)
+    upload = await save_upload(
+        UploadFile(io.BytesIO(data), filename="../photo.jpg"), str(tmp_path), max_bytes=20_000, chunk_size=1024
+    )
+
+    assert os.path.dirname(upload.path) == str(tmp_path)
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    with open(upload.path, "rb") as file:
+        assert file.read() == data
+
+    # Второй файл превышает лимит — первый тоже удаляется
+    files = [UploadFile(io.BytesIO(data), filename="a.jpg"), UploadFile(io.BytesIO(data * 3), filename="b.jpg")]
+    with pytest.raises(HTTPException) as error:
+        await save_uploads(files, str(tmp_path / "batch"), max_bytes=20_000)
+    assert error.value.status_code == 413
+    assert os.listdir(tmp_path / "batch") == []
+
+
+def test_media_blob_reference_counting(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "base_dir", tmp_path)
+    monkeypatch.setattr(settings, "media_blobs_dir", tmp_path / "media" / "blobs")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'media.db'}")
+    Base.metadata.create_all(engine)
+
+    source = tmp_path / "meme.png"
+    Image.new("RGB", (400, 300), "red").save(source)
+    sha256 = file_sha256(str(source))
+    final_path, thumbnail_path = blob_paths(sha256)
+
+    with Session(engine) as db:
+        url, thumbnail_url = acquire_blob(db, sha256, str(source))
+        db.commit()
+        assert url == f"/media/blobs/{sha256[:2]}/{sha256}.jpg"
+        assert final_path.exists() and thumbnail_path.exists()
+
+        # Известный хэш не обрабатывается повторно — исходник уже не нужен
+        assert acquire_blob(db, sha256, str(tmp_path / "missing.png")) == (url, thumbnail_url)
+        db.commit()
+        assert db.get(MediaBlob, sha256).ref_count == 2
+
+        assert not release_blob(db, sha256)
+        db.commit()
+        assert final_path.exists()
+
+        # Откат после последней ссылки: строка и файлы на месте
+        assert release_blob(db, sha256)
+        db.rollback()
+        assert final_path.exists() and thumbnail_path.exists()
+        assert db.get(MediaBlob, sha256).ref_count == 1
+
+        assert release_blob(db, sha256)
+        db.commit()
+        assert final_path.exists()
+        assert remove_blob_files(db, sha256)
+        assert not final_path.exists() and not thumbnail_path.exists()
+        assert db.get(MediaBlob, sha256) is None
+
+    engine.dispose()
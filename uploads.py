@@ -0,0 +1,88 @@
+import hashlib
+import os
+import uuid
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from settings import get_settings
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    size: int
+    # SHA-256 исходных байтов, посчитанный во время записи
+    sha256: str
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Файл больше {max_bytes // (1024 * 1024)} МБ")
+
+
+async def save_upload(
+        file: UploadFile,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """
+    Копирует загрузку во временный файл directory/{uuid}_{имя} кусками по chunk_size байт.
+
+    В памяти одновременно не больше одного куска; запись и хэширование идут в пуле потоков,
+    чтение из UploadFile Starlette само уводит в поток, если файл уже на диске.
+    Превышение max_bytes прерывает копирование с 413 и удаляет недописанный файл.
+    """
+    settings = get_settings()
+    max_bytes = max_bytes or settings.upload_max_bytes
+    chunk_size = chunk_size or settings.upload_chunk_bytes
+
+    # Starlette знает размер, если тело уже прочитано, — отказываем без копирования
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    await run_in_threadpool(os.makedirs, directory, exist_ok=True)
+    # basename: имя файла приходит от клиента и не должно выводить за пределы каталога
+    path = os.path.join(directory, f"{uuid.uuid4()}_{os.path.basename(file.filename or 'upload')}")
+    digest = hashlib.sha256()
+    size = 0
+
+    handle = await run_in_threadpool(open, path, "wb")
+
+    def write(chunk: bytes):
+        handle.write(chunk)
+        digest.update(chunk)
+
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(write, chunk)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(_remove, path)
+        raise
+
+    await run_in_threadpool(handle.close)
+    return StoredUpload(path=path, size=size, sha256=digest.hexdigest())
+
+
+async def save_uploads(files: list[UploadFile], directory: str, max_bytes: Optional[int] = None) -> list[StoredUpload]:
+    """Сохраняет все файлы или ни одного: при ошибке уже записанные удаляются, задачи не ставятся."""
+    stored = []
+    try:
+        for file in files:
+            stored.append(await save_upload(file, directory, max_bytes))
+    except BaseException:
+        for upload in stored:
+            await run_in_threadpool(_remove, upload.path)
+        raise
+    return stored